@@ -0,0 +1,76 @@
+""" Compares the frames per second of the FFT-GUI figures with and without
+blitting while the "Plage" slider is dragged.
+
+The data of every frame is computed before the timing starts, so only
+the session setters and "draw_frame" are measured.
+
+    python benchmarks/bench_blitting.py [--frames 60] [--step 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+
+import config as cfg
+from pipeline import InterferogramPipeline
+from session import SpectrumSession
+from widgets import figures
+
+
+def time_frames(frames, blit, source):
+    session = SpectrumSession()
+    interferogram = figures.InterferogramDynamicCanvas(None, session, blit=blit, figsize=(8, 6), dpi=100)
+    fft = figures.FFTDynamicCanvas(None, session, blit=blit, figsize=(8, 6), dpi=100)
+    interferogram.show()
+    fft.show()
+
+    interferogram.rescale_axis(cfg.interferogram_xaxis_limits[source], cfg.zoomed_interferogram_xaxis_limits[source])
+    fft.rescale_axis(cfg.fft_xaxis_limits[fft.xaxis_type][source], cfg.zoomed_fft_xaxis_limits[fft.xaxis_type][source])
+
+    start = time.perf_counter()
+    for frame in frames:
+        session.set_interferogram(*frame["interferogram"])
+        session.set_spectrum(*frame["spectrum"])
+        interferogram.draw_frame()
+        fft.draw_frame()
+    elapsed = time.perf_counter() - start
+
+    interferogram.close()
+    fft.close()
+    return len(frames)/elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--step", type=float, default=0.05, help="Pas in µm")
+    parser.add_argument("--source", default="HeNe", choices=cfg.sources_sliders.keys())
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+
+    plage = cfg.sources_sliders[args.source]["Plage"]
+    snr = cfg.sources_sliders[args.source]["SNR"]
+    pipeline = InterferogramPipeline()
+    frames = [
+            pipeline.compute_frame({
+                "source": args.source,
+                "Pas": args.step,
+                "Plage": plage["initial"] + i*plage["step"],
+                "SNR": int(snr["base"]**snr["initial"]),
+                "seed": 0,
+                "window": "rectangular",
+                "realizations": 0,
+                "xaxis": "wavelengths"
+            })
+            for i in range(args.frames)
+        ]
+
+    full_fps = time_frames(frames, False, args.source)
+    blit_fps = time_frames(frames, True, args.source)
+    print("Full redraw: {:.1f} fps".format(full_fps))
+    print("Blitting:    {:.1f} fps ({:.2f}x)".format(blit_fps, blit_fps/full_fps))
@@ -0,0 +1,54 @@
+""" Compares the complex FFT of fourierTransformInterferogram with the one-sided
+FFT of fourierTransformRealInterferogram, with and without zero-padding to the
+next 5-smooth length, over the "Pas" and "Plage" ranges of every source in
+config.sources_sliders.
+
+    python benchmarks/bench_fft.py [--plage-values 12] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import config as cfg
+from compute_fft import fourierTransformInterferogram, fourierTransformRealInterferogram
+from sweep import slider_values
+
+
+def best_time(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pas-values", type=int, default=10, help="number of Pas values per source")
+    parser.add_argument("--plage-values", type=int, default=12, help="number of Plage values per source")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = {
+            "fft": lambda x, y: fourierTransformInterferogram(x, y),
+            "rfft": lambda x, y: fourierTransformRealInterferogram(x, y, padToFastLength=False),
+            "rfft + fast length": lambda x, y: fourierTransformRealInterferogram(x, y, padToFastLength=True)
+        }
+
+    for source, sliders in cfg.sources_sliders.items():
+        totals = dict.fromkeys(paths, 0.)
+        worst = dict.fromkeys(paths, (0., 0))
+        for dx in slider_values(sliders["Pas"], args.pas_values):
+            for plage in slider_values(sliders["Plage"], args.plage_values):
+                x = np.arange(0, plage+dx, dx)
+                y = np.cos(2*np.pi/0.6328*x)
+                for name, path in paths.items():
+                    elapsed = best_time(lambda: path(x, y), args.repeat)
+                    totals[name] += elapsed
+                    worst[name] = max(worst[name], (elapsed, len(x)))
+
+        print(source)
+        for name in paths:
+            print("  {:20s} total {:8.3f} s, {:5.2f}x faster than fft, slowest {:7.2f} ms (N={})".format(
+                name, totals[name], totals["fft"]/totals[name], worst[name][0]*1000, worst[name][1]))
@@ -0,0 +1,63 @@
+""" Compares the time and peak memory of the interferogram generators that
+draw their noise with scipy.stats with the seeded kernels writing into
+preallocated buffers (generate_data.heNeSignal, whiteLightSignal and
+gaussianNoise), in float64 and float32.
+
+    python benchmarks/bench_generate.py [--samples 500000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import generate_data
+
+
+def measure(function, repeat):
+    elapsed = min(timeit.repeat(function, number=1, repeat=repeat))
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    dx = 0.01
+    plage = (args.samples-1)*dx
+    snr = 2.56
+    rng = np.random.default_rng(0)
+
+    cases = {}
+    for source, legacy, kernel in [
+                ("HeNe", generate_data.generateHeNeInterferogram, generate_data.heNeSignal),
+                ("WhiteLight", generate_data.generateWhiteLightInterferogram, generate_data.whiteLightSignal)
+            ]:
+        cases[source + ", scipy.stats"] = lambda legacy=legacy: legacy(0, plage, dx, snr)
+
+        for dtype in (np.float64, np.float32):
+            x = generate_data.samplePositions(0, plage, dx, centered=source == "WhiteLight", dtype=dtype)
+            signal, noisy, work = np.empty_like(x), np.empty_like(x), np.empty_like(x)
+            arguments = {"work": work} if kernel is generate_data.whiteLightSignal else {}
+
+            def run(x=x, signal=signal, noisy=noisy, kernel=kernel, arguments=arguments):
+                kernel(x, out=signal, **arguments)
+                generate_data.gaussianNoise(signal, snr, rng, out=noisy)
+
+            cases["{}, kernels {}".format(source, np.dtype(dtype).name)] = run
+
+    print("{} samples".format(args.samples))
+    for name, function in cases.items():
+        elapsed, peak = measure(function, args.repeat)
+        print("  {:28s} {:8.2f} ms {:10.2f} MB peak".format(name, elapsed*1000, peak/1e6))
@@ -0,0 +1,73 @@
+""" Compares the accuracy and speed of the non-uniform FFT (nonuniform.nonUniformFourierTransform) with the direct
+non-uniform DFT, on HeNe interferograms sampled at jittered positions with missed steps, or on the positions and
+voltages of a file saved by Michelson-GUI. The spectrum of the FFT that assumes equidistant samples is also compared
+to show the smearing that the non-uniform transforms avoid.
+
+    python benchmarks/bench_nonuniform.py [--sizes 1000 4000 16000] [--jitter 0.002] [--missed 0.02] [--file data.json]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from compute_fft import fourierTransformRealInterferogram
+from generate_data import heNeSignal
+from nonuniform import loadMichelsonData, spectrumFrequencies, directFourierTransform, nonUniformFourierTransform
+
+
+def jittered_interferogram(samples, step, jitter, missed, rng):
+    """ HeNe interferogram at positions spaced by "step" (µm) with a gaussian jitter of "jitter" µm, where a fraction
+    "missed" of the steps is skipped.
+    """
+    steps = np.full(samples, step)
+    steps[rng.random(samples) < missed] *= 2
+    x = np.cumsum(steps) + rng.normal(0, jitter, samples)
+    x.sort()
+    return x, heNeSignal(x)
+
+
+def best_time(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def compare(x, y, repeat, direct_limit):
+    frequencies = spectrumFrequencies(x)
+    nufft_time = best_time(lambda: nonUniformFourierTransform(x, y), repeat)
+    nufft = nonUniformFourierTransform(x, y)[2]
+
+    uniform = abs(fourierTransformRealInterferogram(x, y, padToFastLength=False)[2]).max()
+    line = "N={:7d}  K={:7d}  nufft {:8.2f} ms  peak/uniform-FFT peak {:5.2f}".format(
+            len(x), len(frequencies), nufft_time*1000, abs(nufft).max()/uniform)
+
+    if len(x)*len(frequencies) <= direct_limit:
+        direct_time = best_time(lambda: directFourierTransform(x, y, frequencies), 1)
+        direct = directFourierTransform(x, y, frequencies)
+        error = abs(nufft - direct).max()/abs(direct).max()
+        line += "  direct {:9.2f} ms  ({:6.1f}x)  max relative error {:.1e}".format(
+                direct_time*1000, direct_time/nufft_time, error)
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000, 64000, 256000])
+    parser.add_argument("--step", type=float, default=0.02, help="nominal step between positions (µm)")
+    parser.add_argument("--jitter", type=float, default=0.002, help="standard deviation of the positions (µm)")
+    parser.add_argument("--missed", type=float, default=0.02, help="fraction of missed steps")
+    parser.add_argument("--file", help="JSON file saved by Michelson-GUI, replaces the generated interferograms")
+    parser.add_argument("--direct-limit", type=float, default=2e8, help="largest N*K computed with the direct DFT")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        x, y = loadMichelsonData(args.file)
+        compare(x, y - y.mean(), args.repeat, args.direct_limit)
+    else:
+        rng = np.random.default_rng(0)
+        for samples in args.sizes:
+            x, y = jittered_interferogram(samples, args.step, args.jitter, args.missed, rng)
+            compare(x, y, args.repeat, args.direct_limit)
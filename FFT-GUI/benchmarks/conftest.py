@@ -0,0 +1,145 @@
+""" Measures and baseline of the benchmark suite (see test_hot_path.py).
+
+The "stage_benchmark" fixture times a function, keeping the fastest of a few repetitions, and measures its peak memory
+with tracemalloc. The measures are compared with those of the same benchmark in baseline.json: a benchmark slower than
+"--time-tolerance" times its baseline, or using more than "--memory-tolerance" times its baseline memory, fails. The
+times of drawing the figures depend on the load of the display and of the machine more than the computations, they
+have their own "--draw-time-tolerance". With "--update-baseline", the measures are saved as the new baseline instead.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Differences below these are measurement noise whatever the tolerance
+time_slack = 1e-3
+memory_slack = 1e6
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--update-baseline", action="store_true",
+                    help="save the measures in baseline.json instead of comparing them")
+    group.addoption("--time-tolerance", type=float, default=1.5,
+                    help="largest accepted ratio of a time to its baseline (default: 1.5)")
+    group.addoption("--draw-time-tolerance", type=float, default=3,
+                    help="largest accepted ratio of a drawing time to its baseline (default: 3)")
+    group.addoption("--memory-tolerance", type=float, default=1.2,
+                    help="largest accepted ratio of a peak memory to its baseline (default: 1.2)")
+
+
+class Baseline:
+    """ Measures of baseline.json, as {benchmark: {"time": seconds, "peak memory": bytes}}, and of the current run. """
+
+    def __init__(self, path, time_tolerance, memory_tolerance, draw_time_tolerance=None):
+        self.path = path
+        self.time_tolerance = time_tolerance
+        self.draw_time_tolerance = time_tolerance if draw_time_tolerance is None else draw_time_tolerance
+        self.memory_tolerance = memory_tolerance
+        self.measures = {}
+
+        self.reference = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                self.reference = json.load(file)
+
+    def regressions(self, name, measures, drawing=False):
+        """ Messages describing how the measures of a benchmark exceed its baseline. The time of a "drawing" benchmark
+        is compared with the drawing time tolerance.
+        """
+        self.measures[name] = measures
+        if name not in self.reference:
+            warnings.warn("{} has no baseline, run with --update-baseline to save one".format(name))
+            return []
+
+        reference = self.reference[name]
+        time_tolerance = self.draw_time_tolerance if drawing else self.time_tolerance
+        messages = []
+        if measures["time"] > reference["time"]*time_tolerance + time_slack:
+            messages.append("time {:.4g} s, baseline {:.4g} s (x{:.2f})".format(
+                    measures["time"], reference["time"], measures["time"]/reference["time"]))
+        if measures["peak memory"] > reference["peak memory"]*self.memory_tolerance + memory_slack:
+            messages.append("peak memory {:.1f} MB, baseline {:.1f} MB (x{:.2f})".format(
+                    measures["peak memory"]/1e6, reference["peak memory"]/1e6,
+                    measures["peak memory"]/reference["peak memory"]))
+        return messages
+
+    def save(self):
+        # The benchmarks that did not run this time keep their baseline
+        with open(self.path, "w") as file:
+            json.dump(dict(self.reference, **self.measures), file, indent=4, sort_keys=True)
+
+
+def measure(function, min_repeat=3, max_repeat=10, min_time=0.5):
+    """ Fastest time of at least "min_repeat" calls of the function, more while they last less than "min_time" in
+    total, and the peak memory of one more call. A first call, not measured, fills the caches of the figures and of
+    the FFT plans.
+    """
+    function()
+
+    times = []
+    while len(times) < min_repeat or (len(times) < max_repeat and sum(times) < min_time):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"time": min(times), "peak memory": peak}
+
+
+@pytest.fixture(scope="session")
+def baseline(pytestconfig):
+    baseline = Baseline(baseline_path, pytestconfig.getoption("time_tolerance"),
+                        pytestconfig.getoption("memory_tolerance"), pytestconfig.getoption("draw_time_tolerance"))
+    # For the summary table of pytest_terminal_summary
+    pytestconfig._benchmark_baseline = baseline
+    yield baseline
+    if pytestconfig.getoption("update_baseline"):
+        baseline.save()
+
+
+@pytest.fixture
+def stage_benchmark(request, baseline):
+    """ Function measuring a function under the name of the test and failing when it regressed from the baseline. A
+    benchmark drawing the figures passes drawing=True.
+    """
+    def benchmark(function, drawing=False):
+        measures = measure(function)
+        if request.config.getoption("update_baseline"):
+            baseline.measures[request.node.name] = measures
+            return measures
+
+        messages = baseline.regressions(request.node.name, measures, drawing)
+        if messages:
+            pytest.fail("{} regressed: {}".format(request.node.name, ", ".join(messages)), pytrace=False)
+        return measures
+    return benchmark
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """ Table of the measures of the run next to their baseline. """
+    baseline = getattr(config, "_benchmark_baseline", None)
+    if baseline is None or not baseline.measures:
+        return
+
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line("{:<52} {:>11} {:>11} {:>10} {:>10}".format(
+            "benchmark", "time [ms]", "base [ms]", "peak [MB]", "base [MB]"))
+    for name, measures in baseline.measures.items():
+        reference = baseline.reference.get(name, {"time": float("nan"), "peak memory": float("nan")})
+        terminalreporter.write_line("{:<52} {:>11.3f} {:>11.3f} {:>10.2f} {:>10.2f}".format(
+                name, measures["time"]*1e3, reference["time"]*1e3,
+                measures["peak memory"]/1e6, reference["peak memory"]/1e6))
@@ -0,0 +1,117 @@
+""" Benchmarks of each stage between a slider movement and the drawn frame: generation of the interferogram, noise, FFT,
+search of the zoomed range and "draw_frame" of the two figures on the Agg backend. Each stage runs at the four corners
+of the Pas and Plage slider ranges of every source of config.sources_sliders, with the initial SNR.
+
+    python -m pytest benchmarks                     compare with benchmarks/baseline.json
+    python -m pytest benchmarks --update-baseline   save the measures as the new baseline
+
+The times depend on the machine, the baseline has to be saved on the machine running the comparisons.
+"""
+from functools import lru_cache
+
+import pytest
+
+import config as cfg
+from compute_fft import fourierTransformRealInterferogram
+import generate_data
+from pipeline import InterferogramPipeline
+from render import OffscreenInterferogram, OffscreenFFT
+from session import SpectrumSession
+import sources
+from zoom_index import ZoomIndex
+
+
+def slider_corners():
+    for source, sliders in cfg.sources_sliders.items():
+        for pas_end in ["minimum", "maximum"]:
+            for plage_end in ["minimum", "maximum"]:
+                pas = sliders["Pas"][pas_end]/sliders["Pas"]["scale"]
+                plage = sliders["Plage"][plage_end]/sliders["Plage"]["scale"]
+                yield pytest.param(source, pas, plage,
+                                   id="{}-Pas_{}-Plage_{}".format(source, pas_end[:3], plage_end[:3]))
+
+
+corners = pytest.mark.parametrize("source, pas, plage", list(slider_corners()))
+
+
+def initial_snr(source):
+    snr = cfg.sources_sliders[source]["SNR"]
+    return int(snr["base"]**(snr["initial"]/snr["scale"]))
+
+
+@lru_cache(maxsize=1)
+def signal(source, pas, plage):
+    return sources.registry[source].generate(0, plage, pas)
+
+
+@lru_cache(maxsize=1)
+def noisy_signal(source, pas, plage):
+    x, y = signal(source, pas, plage)
+    return x, add_noise(y, initial_snr(source))
+
+
+def add_noise(y, snr):
+    # As the noise stage of the pipeline
+    y = generate_data.addGaussianNoise(y, snr/100, 0)
+    y /= y.max()
+    return y
+
+
+@lru_cache(maxsize=1)
+def offscreen_figures(source):
+    session = SpectrumSession()
+    interferogram = OffscreenInterferogram(session, figsize=(8, 6), dpi=100)
+    fft = OffscreenFFT(session, figsize=(8, 6), dpi=100)
+    interferogram.rescale_axis(cfg.interferogram_xaxis_limits[source], cfg.zoomed_interferogram_xaxis_limits[source])
+    fft.rescale_axis(cfg.fft_xaxis_limits[fft.xaxis_type][source], cfg.zoomed_fft_xaxis_limits[fft.xaxis_type][source])
+    return session, interferogram, fft
+
+
+@corners
+def test_generation(stage_benchmark, source, pas, plage):
+    stage_benchmark(lambda: sources.registry[source].generate(0, plage, pas))
+
+
+@corners
+def test_noise(stage_benchmark, source, pas, plage):
+    y = signal(source, pas, plage)[1]
+    stage_benchmark(lambda: add_noise(y, initial_snr(source)))
+
+
+@corners
+def test_fft(stage_benchmark, source, pas, plage):
+    x, y = noisy_signal(source, pas, plage)
+    stage_benchmark(lambda: fourierTransformRealInterferogram(x, y))
+
+
+@corners
+def test_zoom_range(stage_benchmark, source, pas, plage):
+    x, y = noisy_signal(source, pas, plage)
+    limits = cfg.interferogram_xaxis_limits[source]
+    zoomed_limits = cfg.zoomed_interferogram_xaxis_limits[source]
+
+    def search():
+        # The work of the interferogram figure when its data changes
+        index = ZoomIndex(x, y)
+        index.window(limits, margin=1)
+        index.window(zoomed_limits, margin=1)
+        index.y_range(zoomed_limits, default=(-1, 1))
+    stage_benchmark(search)
+
+
+@corners
+def test_draw_frame(stage_benchmark, source, pas, plage):
+    grids = None
+    if cfg.wavelength_resampling["enabled"]:
+        grids = {source: (*cfg.fft_xaxis_limits["wavelengths"][source], cfg.wavelength_resampling["points"])}
+    frame = InterferogramPipeline(max_entries=1, wavelength_grids=grids).compute_frame({"source": source, "Pas": pas,
+            "Plage": plage, "SNR": initial_snr(source), "seed": 0, "window": "rectangular", "realizations": 0,
+            "xaxis": "wavelengths"})
+    session, interferogram, fft = offscreen_figures(source)
+
+    def draw():
+        session.set_interferogram(*frame["interferogram"])
+        session.set_spectrum(*frame["spectrum"])
+        interferogram.draw_frame()
+        fft.draw_frame()
+    stage_benchmark(draw, drawing=True)
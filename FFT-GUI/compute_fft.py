@@ -1,8 +1,9 @@
-from numpy.random import *
-from numpy.fft import *
+from functools import lru_cache
 
+import numpy as np
 
-def fourierTransformInterferogram(x,y):
+
+def fourierTransformInterferogram(x,y, window="rectangular"):
 	""" A partir du tableau de valeurs Y correspondant a l'abscisse X, 
 	la transformée de Fourier est calculée et l'axes des fréquences (f en 
 	µm^-1) et des wavelengths (1/f en microns) est retournée.
@@ -13,10 +14,187 @@ def fourierTransformInterferogram(x,y):
 	(N/2) ieme valeur, la frequence est negative jusqu'a -∆f dans la N-1 case.
 	Voir 
 	https://github.com/dccote/Enseignement/blob/master/HOWTO/HOWTO-Transformes%20de%20Fourier%20discretes.pdf 
+
+	Y est multiplié par la fenêtre d'apodisation "window" (voir
+	apodizationWindow) avant la transformée. Les axes retournés sont partagés
+	entre les appels (voir spectrumAxes) et sont en lecture seule.
 	"""
-	spectrum = fft(y)
 	dx = x[1]-x[0] # on obtient dx, on suppose equidistant
 	N = len(x)     # on obtient N directement des données
-	frequencies = fftfreq(N, dx) # Cette fonction est fournie par numpy
-	wavelengths = 1/frequencies  # Les fréquences en µm^-1 sont moins utiles que lambda en µm
+	if window != "rectangular":
+		y = y*apodizationWindow(window, N)
+	spectrum = np.fft.fft(y)
+	wavelengths, frequencies = spectrumAxes(N, float(dx), oneSided=False)
 	return (wavelengths, frequencies, spectrum)
+
+
+apodizationWindows = ["rectangular", "hann", "blackman-harris", "norton-beer", "triangular"]
+
+@lru_cache(maxsize=32)
+def apodizationWindow(name, N):
+	""" Fenêtre d'apodisation "name" (voir apodizationWindows) de N points,
+	symétrique sur toute la plage de l'interférogramme. L'interférogramme
+	s'arrête brusquement aux bords de la plage, ce qui donne au spectre les
+	lobes secondaires d'un sinus cardinal. Les fenêtres ramènent
+	l'interférogramme à 0 aux bords: les lobes disparaissent, mais les raies
+	s'élargissent.
+
+	La fenêtre est normalisée pour que sa moyenne soit 1: la hauteur d'une
+	raie ne change presque pas d'une fenêtre à l'autre. Les fenêtres sont
+	gardées en cache par (name, N) et sont en lecture seule.
+	"""
+	u = np.linspace(-1, 1, N) # position relative: 0 au centre, -1 et 1 aux bords
+
+	if name == "rectangular" or N == 1:
+		window = np.ones(N)
+	elif name == "hann":
+		window = 0.5 + 0.5*np.cos(np.pi*u)
+	elif name == "blackman-harris":
+		# 4 termes, lobes secondaires sous -92 dB
+		window = 0.35875 + 0.48829*np.cos(np.pi*u) + 0.14128*np.cos(2*np.pi*u) + 0.01168*np.cos(3*np.pi*u)
+	elif name == "norton-beer":
+		# Apodisation "moyenne" de Norton et Beer (1976), utilisée en spectroscopie infrarouge
+		q = 1 - u*u
+		window = 0.152442 - 0.136176*q + 0.983734*q*q
+	elif name == "triangular":
+		window = 1 - abs(u)
+	else:
+		raise ValueError("Unknown apodization window")
+
+	window /= window.mean()
+	window.setflags(write=False)
+	return window
+
+
+@lru_cache(maxsize=32)
+def spectrumAxes(M, dx, oneSided=True):
+	""" Axes (longueurs d'onde, fréquences) du spectre de M points d'un
+	interférogramme échantillonné au pas dx: les fréquences positives de rfft
+	si oneSided, sinon toutes les fréquences de fft. La longueur d'onde de la
+	valeur DC vaut NaN. Les axes sont gardés en cache par (M, dx, oneSided)
+	pour ne pas être recalculés à chaque image, et sont en lecture seule.
+	"""
+	frequencies = np.fft.rfftfreq(M, dx) if oneSided else np.fft.fftfreq(M, dx)
+	wavelengths = np.empty_like(frequencies)
+	wavelengths[0] = np.nan
+	np.divide(1, frequencies[1:], out=wavelengths[1:])
+
+	frequencies.setflags(write=False)
+	wavelengths.setflags(write=False)
+	return wavelengths, frequencies
+
+
+def nextFastLength(n):
+	""" Retourne le plus petit entier >= n qui n'a que 2, 3 et 5 comme facteurs
+	premiers (nombre 5-lisse). La FFT est la plus rapide pour ces longueurs,
+	alors qu'un N premier passe par un algorithme beaucoup plus lent.
+	"""
+	best = 1 << (n-1).bit_length() # Puissance de 2 >= n
+	power5 = 1
+	while power5 < best:
+		power35 = power5
+		while power35 < best:
+			quotient = -(-n // power35)
+			candidate = power35 * (1 << (quotient-1).bit_length())
+			if candidate == n:
+				return n
+			best = min(best, candidate)
+			power35 *= 3
+		power5 *= 5
+	return best
+
+
+def fourierTransformRealInterferogram(x, y, padToFastLength=True, window="rectangular"):
+	""" Version de fourierTransformInterferogram pour un interférogramme réel.
+	Le spectre d'un signal réel est symétrique, donc seules les fréquences
+	positives sont calculées (rfft): de la valeur DC (0) jusqu'a f_max=1/2/∆x.
+
+	Avec padToFastLength, Y est complété par des zéros jusqu'a la prochaine
+	longueur rapide M >= N (voir nextFastLength). L'espacement entre les points
+	du spectre devient ∆f = 1/M/∆x, qui est retourné avec le spectre. Le zero
+	padding interpole le spectre, la résolution physique reste 1/N/∆x.
+
+	La valeur DC n'a pas de longueur d'onde: elle vaut NaN au lieu de inf et
+	peut être ignorée avec wavelengths[1:].
+
+	Y peut aussi être un tableau (K, N) de K interférogrammes échantillonnés
+	aux mêmes positions x: les K spectres sont calculés par une seule FFT le
+	long du dernier axe et le spectre retourné a la forme (K, M//2+1).
+
+	La fenêtre d'apodisation "window" est appliquée avant le zero padding,
+	sur les N points mesurés.
+	"""
+	dx = x[1]-x[0] # on obtient dx, on suppose equidistant
+	N = len(x)
+	M = nextFastLength(N) if padToFastLength else N
+
+	if window != "rectangular":
+		y = y*apodizationWindow(window, N)
+	spectrum = np.fft.rfft(y, M)
+	wavelengths, frequencies = spectrumAxes(M, float(dx))
+	return (wavelengths, frequencies, spectrum, 1/M/dx)
+
+
+@lru_cache(maxsize=16)
+def wavelengthResamplingIndex(length, df, wavelengthMin, wavelengthMax, points):
+	""" Index pour rééchantillonner un spectre de rfft de "length" points
+	espacés de df (µm^-1) sur "points" longueurs d'onde (nm) réparties
+	uniformément entre wavelengthMin et wavelengthMax.
+
+	Les longueurs d'onde 1000/f des points du spectre sont très mal réparties:
+	espacées aux grandes longueurs d'onde et entassées aux petites. Chaque
+	point de la grille prend la plus grande de deux valeurs: l'interpolation
+	linéaire en fréquence entre les deux points du spectre qui l'entourent, et
+	le maximum des points du spectre qui tombent dans sa cellule de la grille,
+	pour que les raies étroites gardent leur hauteur. La grille commence à la
+	plus petite longueur d'onde du spectre (fréquence maximale), les longueurs
+	d'onde plus courtes sont retirées.
+
+	L'index ne dépend que de (length, df, grille), il est gardé en cache et
+	ses tableaux sont en lecture seule (voir resampleToWavelengths).
+	"""
+	grid = np.linspace(wavelengthMin, wavelengthMax, points)
+	step = (wavelengthMax-wavelengthMin)/max(points-1, 1)
+	last = length-1
+
+	# Position de chaque longueur d'onde et des bords de sa cellule dans le
+	# spectre, infinie à 0 nm
+	with np.errstate(divide="ignore"):
+		position = 1000/grid/df
+		edges = 1000/np.append(grid-step/2, grid[-1]+step/2)/df
+	edges[edges < 0] = np.inf
+
+	inside = (grid > 0) & (position <= last)
+	grid, position = grid[inside], position[inside]
+	lower = np.minimum(np.floor(position), last-1).astype(np.intp)
+	upperWeight = position-lower
+	lowerWeight = 1-upperWeight
+
+	# Les fréquences décroissent quand la longueur d'onde augmente: la cellule
+	# j contient les points du spectre entre edges[j+1] et edges[j]. Les bornes
+	# [début, fin) des cellules non vides sont entrelacées pour reduceat.
+	starts = np.ceil(np.minimum(edges[1:][inside], length)).astype(np.intp)
+	stops = np.floor(np.minimum(edges[:-1][inside], last-1)).astype(np.intp) + 1
+	cells = np.flatnonzero(stops > starts)
+	bounds = np.empty(2*len(cells), dtype=np.intp)
+	bounds[0::2] = starts[cells]
+	bounds[1::2] = stops[cells]
+
+	index = (grid, lower, lowerWeight, upperWeight, cells, bounds)
+	for array in index:
+		array.setflags(write=False)
+	return index
+
+
+def resampleToWavelengths(amplitudes, index):
+	""" Rééchantillonne les amplitudes d'un spectre de rfft sur la grille d'un
+	index de wavelengthResamplingIndex. Retourne (longueurs d'onde en nm,
+	amplitudes).
+	"""
+	grid, lower, lowerWeight, upperWeight, cells, bounds = index
+
+	values = amplitudes[lower]*lowerWeight
+	values += amplitudes[lower+1]*upperWeight
+	if len(cells):
+		values[cells] = np.maximum(values[cells], np.maximum.reduceat(amplitudes, bounds)[0::2])
+	return grid, values
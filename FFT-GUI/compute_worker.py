@@ -0,0 +1,117 @@
+import threading
+import traceback
+
+from PyQt5 import QtCore
+
+
+class ComputeWorker(QtCore.QThread):
+    """
+    Thread that computes the figures data outside of the Qt GUI thread.
+
+    Requests are handled with a "latest wins" policy: a request submitted while another one is still waiting replaces
+    it, and a finished result that was not displayed before a newer one finished is replaced as well. Replaced requests
+    and results are counted as dropped, displayed results are counted as finished.
+
+    The "result_ready" signal is emitted when a result can be fetched with "take_result" and "counters_changed" is
+    emitted each time the "finished_count" or "dropped_count" attributes change. "cancel" drops the waiting request and
+    the result of the request being computed, for when the figures were updated by other means.
+
+    A request whose computation raises is given up and counted in "failed_count": "compute_failed" is emitted with the
+    error message and the thread goes on with the next request.
+    """
+
+    result_ready = QtCore.pyqtSignal()
+    counters_changed = QtCore.pyqtSignal()
+    compute_failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, compute_function, parent=None):
+        super().__init__(parent)
+
+        self._compute = compute_function
+        self._condition = threading.Condition()
+        self._pending_request = None
+        self._result = None
+        self._running = True
+        self._computing = None  # Generation of the request being computed
+        self._generation = 0
+
+        self.finished_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+
+    def request(self, parameters):
+        """ Queues a snapshot of the parameters, replacing the request still waiting if there is one. """
+        with self._condition:
+            if self._pending_request is not None:
+                self.dropped_count += 1
+            self._pending_request = parameters
+            self._condition.notify()
+
+        self.counters_changed.emit()
+
+    def cancel(self):
+        """ Drops the waiting request, the result not taken yet and the result of the request being computed. """
+        with self._condition:
+            self.dropped_count += (self._pending_request is not None) + (self._result is not None)
+            self.dropped_count += self._computing == self._generation
+            self._pending_request = None
+            self._result = None
+            self._generation += 1
+
+        self.counters_changed.emit()
+
+    def busy(self):
+        """ Whether a request is waiting or being computed. """
+        with self._condition:
+            return self._pending_request is not None or self._computing is not None
+
+    def take_result(self):
+        """ Returns the newest finished result or None if it was already taken. """
+        with self._condition:
+            result, self._result = self._result, None
+            if result is not None:
+                self.finished_count += 1
+
+        if result is not None:
+            self.counters_changed.emit()
+        return result
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending_request is None and self._running:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                parameters, self._pending_request = self._pending_request, None
+                generation = self._computing = self._generation
+
+            result = None
+            try:
+                result = self._compute(parameters)
+            except Exception as error:
+                traceback.print_exc()
+                with self._condition:
+                    self.failed_count += 1
+                self.compute_failed.emit("{}: {}".format(type(error).__name__, error))
+            finally:
+                # Otherwise "busy" would stay True and the prefetcher would wait forever
+                with self._condition:
+                    self._computing = None
+                    if generation != self._generation:
+                        # Cancelled while it was computed, already counted as dropped
+                        result = None
+                    elif result is not None:
+                        if self._result is not None:
+                            self.dropped_count += 1
+                        self._result = result
+
+            if result is not None:
+                self.result_ready.emit()
+            self.counters_changed.emit()
@@ -19,34 +19,103 @@ rcParams["legend.edgecolor"] = "white"
 rcParams["legend.fontsize"] = 10
 rcParams["text.color"] = darkblack
 
+# When True, the figures only redraw their lines and zoom rectangles over a
+# cached background while the axes limits stay the same (see BlittedCanvas).
+blit_figures = True
 
+# Bounds of each cached stage of the computation pipeline (see pipeline.py)
+pipeline_cache = {
+        "entries"  : 16,
+        "megabytes": 128
+    }
+
+# Frames of the slider positions up to "radius" steps away from the displayed
+# one are computed in advance while the interface is idle, within "megabytes"
+# of memory (see prefetch.py). A radius of 0 disables the prefetching.
+prefetch = {
+        "radius"   : 2,
+        "megabytes": 64
+    }
+
+# Monte-Carlo mode of the spectrum: the number of noise realizations is a power
+# of two between "minimum" and "maximum" adjusted so that computing them takes
+# about "frame_time" seconds and at most "megabytes" of memory. The shaded band
+# spans the "percentiles" of the realizations around their mean spectrum.
+monte_carlo = {
+        "frame_time" : 0.15,
+        "minimum"    : 8,
+        "maximum"    : 512,
+        "megabytes"  : 256,
+        "percentiles": (5, 95)
+    }
+
+# Apodization windows of the spectrum (see compute_fft.apodizationWindow) and
+# their names in the interface
+apodization_windows = {
+        "rectangular"    : "Sans apodisation",
+        "hann"           : "Fenêtre de Hann",
+        "blackman-harris": "Fenêtre de Blackman-Harris",
+        "norton-beer"    : "Fenêtre de Norton-Beer",
+        "triangular"     : "Fenêtre triangulaire"
+    }
+
+
+# Every source of sources.registry needs an entry in the axes limits below
+# and in "sources_sliders"
 interferogram_xaxis_limits = {
         "HeNe": [0, 300],
-        "WhiteLight": [-50, 50]
+        "WhiteLight": [-50, 50],
+        "Sodium": [0, 1500],
+        "Mercury": [0, 300],
+        "BlueLED": [-25, 25]
     }
 zoomed_interferogram_xaxis_limits = {
         "HeNe": [0, 5],
-        "WhiteLight": [-3, 3]
+        "WhiteLight": [-3, 3],
+        "Sodium": [0, 5],
+        "Mercury": [0, 5],
+        "BlueLED": [-5, 5]
     }
 
+# Only the positive frequencies of the spectrum are computed
 fft_xaxis_limits =  {
         "frequencies": {
-            "HeNe": [-3, 3],
-            "WhiteLight": [-5, 5]
+            "HeNe": [0, 3],
+            "WhiteLight": [0, 5],
+            "Sodium": [0, 3],
+            "Mercury": [0, 3],
+            "BlueLED": [0, 5]
         },
         "wavelengths": {
-            "HeNe": [-1000, 1000],
-            "WhiteLight": [-2000, 2000]
+            "HeNe": [0, 1000],
+            "WhiteLight": [0, 2000],
+            "Sodium": [0, 1000],
+            "Mercury": [0, 1000],
+            "BlueLED": [0, 1000]
         }
     }
+# The spectrum against wavelengths is resampled on "points" wavelengths evenly
+# spread over its limits in fft_xaxis_limits, the spectrum points themselves
+# crowd at short wavelengths (see compute_fft.wavelengthResamplingIndex). The
+# grid must stay finer than the narrowest zoomed limits.
+wavelength_resampling = {
+        "enabled": True,
+        "points" : 20000
+    }
 zoomed_fft_xaxis_limits =  {
         "frequencies": {
             "HeNe": [1.5, 1.65],
-            "WhiteLight": [0.75, 2.75]
+            "WhiteLight": [0.75, 2.75],
+            "Sodium": [1.69, 1.705],
+            "Mercury": [1.6, 2.6],
+            "BlueLED": [1.95, 2.45]
         },
         "wavelengths": {
             "HeNe": [620, 650],
-            "WhiteLight": [200, 1000]
+            "WhiteLight": [200, 1000],
+            "Sodium": [585, 594],
+            "Mercury": [390, 600],
+            "BlueLED": [400, 520]
         }
     }
 
@@ -115,6 +184,93 @@ sources_sliders = {
                 "unit"   : "-",
                 "base"   : 2,
 
+                "initial": 8,
+                "minimum": 4,
+                "maximum": 16,
+                "step"   : 1,
+                "scale"  : 1
+            }
+        },
+        "Sodium": {
+
+            "Pas": {
+                "unit"   : "µm",
+                "initial": 1,
+                "minimum": 1,
+                "maximum": 40,
+                "step"   : 1,
+                "scale"  : 100
+            },
+            "Plage": {
+                "unit"   : "µm",
+                "initial": 1000,
+                "minimum": 100,
+                "maximum": 5000,
+                "step"   : 5,
+                "scale"  : 1
+            },
+            "SNR": {
+                "unit"   : "-",
+                "base"   : 2,
+
+                "initial": 8,
+                "minimum": 4,
+                "maximum": 14,
+                "step"   : 1,
+                "scale"  : 1
+            }
+        },
+        "Mercury": {
+
+            "Pas": {
+                "unit"   : "µm",
+                "initial": 1,
+                "minimum": 1,
+                "maximum": 40,
+                "step"   : 1,
+                "scale"  : 100
+            },
+            "Plage": {
+                "unit"   : "µm",
+                "initial": 250,
+                "minimum": 100,
+                "maximum": 5000,
+                "step"   : 5,
+                "scale"  : 1
+            },
+            "SNR": {
+                "unit"   : "-",
+                "base"   : 2,
+
+                "initial": 8,
+                "minimum": 4,
+                "maximum": 14,
+                "step"   : 1,
+                "scale"  : 1
+            }
+        },
+        "BlueLED": {
+
+            "Pas": {
+                "unit"   : "µm",
+                "initial": 1,
+                "minimum": 1,
+                "maximum": 40,
+                "step"   : 1,
+                "scale"  : 100
+            },
+            "Plage": {
+                "unit"   : "µm",
+                "initial": 40,
+                "minimum": 10,
+                "maximum": 100,
+                "step"   : 5,
+                "scale"  : 1
+            },
+            "SNR": {
+                "unit"   : "-",
+                "base"   : 2,
+
                 "initial": 8,
                 "minimum": 4,
                 "maximum": 16,
@@ -0,0 +1,78 @@
+import numpy as np
+
+""" Reduction du nombre de points envoyés à matplotlib. Une ligne de 500 000
+points dessinée dans un axe de 500 pixels de large ne montre jamais plus que
+le minimum et le maximum des points qui tombent dans chaque colonne de pixels.
+"""
+
+
+def minMaxDecimate(x, y, xlim, pixels):
+    """ Retourne les points de (x, y) visibles entre xlim[0] et xlim[1],
+    réduits à au plus deux points par pixel horizontal: le minimum et le
+    maximum de y dans chaque colonne de pixels. L'enveloppe est donc conservée
+    et les pics ont la même hauteur qu'avec toutes les données.
+
+    X doit être monotone, comme une fenêtre retournée par ZoomIndex.window. Les
+    bornes de la plage visible sont trouvées par recherche binaire et les
+    points qui l'encadrent sont conservés pour que la ligne se rende jusqu'au
+    bord de l'axe. Le minimum et le maximum de chaque colonne sont retournés
+    dans l'ordre des données, pour que la ligne ne revienne jamais en arrière.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    pixels = max(int(pixels), 1)
+    if len(x) == 0 or xlim[1] <= xlim[0]:
+        return x, y
+
+    if len(x) > 1 and x[-1] < x[0]:
+        # Axe décroissant (longueurs d'onde): une vue inversée suffit
+        x, y = x[::-1], y[::-1]
+
+    low = max(np.searchsorted(x, xlim[0], side="left") - 1, 0)
+    high = min(np.searchsorted(x, xlim[1], side="right") + 1, len(x))
+    x, y = x[low:high], y[low:high]
+    if len(x) <= 2*pixels:
+        return x, y
+
+    columns = (x - xlim[0])*(pixels/(xlim[1] - xlim[0]))
+    columns = np.clip(np.floor(columns), -1, pixels).astype(np.intp)
+    starts = np.flatnonzero(np.diff(columns, prepend=columns[0]-1))
+    counts = np.diff(starts, append=len(x))
+
+    # Indice du premier minimum et du premier maximum de chaque colonne. fmin
+    # et fmax ignorent les NaN; une colonne qui n'a que des NaN garde son
+    # premier point.
+    positions = np.arange(len(x))
+    minima = np.minimum.reduceat(np.where(y == np.repeat(np.fmin.reduceat(y, starts), counts), positions, len(x)),
+                                 starts)
+    maxima = np.minimum.reduceat(np.where(y == np.repeat(np.fmax.reduceat(y, starts), counts), positions, len(x)),
+                                 starts)
+    minima = np.where(minima == len(x), starts, minima)
+    maxima = np.where(maxima == len(x), starts, maxima)
+
+    indices = np.empty(2*len(starts), dtype=np.intp)
+    indices[0::2] = np.minimum(minima, maxima)
+    indices[1::2] = np.maximum(minima, maxima)
+    return x[indices], y[indices]
+
+def bandDecimate(x, low, high, xlim, pixels):
+    """ Réduit une bande comprise entre les courbes low et high à un point par
+    pixel horizontal: le minimum de low et le maximum de high des points de
+    chaque colonne de pixels, pour que la bande dessinée contienne toujours
+    la bande complète. X doit être monotone, comme une fenêtre retournée par
+    ZoomIndex.window.
+    """
+    x = np.asarray(x)
+    low = np.asarray(low)
+    high = np.asarray(high)
+    pixels = max(int(pixels), 1)
+    if len(x) <= pixels or xlim[1] <= xlim[0]:
+        return x, low, high
+
+    if x[-1] < x[0]:
+        x, low, high = x[::-1], low[::-1], high[::-1]
+
+    columns = (x - xlim[0])*(pixels/(xlim[1] - xlim[0]))
+    columns = np.clip(np.floor(columns), -1, pixels).astype(np.intp)
+    starts = np.flatnonzero(np.diff(columns, prepend=columns[0]-1))
+    return x[starts], np.minimum.reduceat(low, starts), np.maximum.reduceat(high, starts)
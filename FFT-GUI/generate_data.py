@@ -1,8 +1,8 @@
+from math import ceil
+
 import numpy as np
-from numpy.random import *
-from numpy.fft import *
-import matplotlib.pyplot as plt
-from scipy import stats
+
+from compute_fft import nextFastLength
 
 """ Ce script genere des donnees telles qu'obtenues avec un interferometre
 de Michelson dans le but d'etudier la transformée de Fourier et de comprendre 
@@ -16,8 +16,9 @@ def generateHeNeInterferogram(xMin, xMax, dx, snr):
     a 0.6328 microns. Du bruit est ajouté à partir du rapport signal sur bruit
     snr.
     """
-    x = np.arange(xMin, xMax+dx, dx) 
-    y = np.cos(2 * np.pi / 0.6328 * x)
+    from scipy import stats  # scipy is slow to import and only used here
+
+    x, y = generateHeNeSignal(xMin, xMax, dx)
 
     return x, stats.norm.rvs(size=len(y), loc=y, scale=abs(y)/snr)
 
@@ -27,12 +28,172 @@ def generateWhiteLightInterferogram(xMin, xMax, dx, snr):
     blanche visible. Du bruit est ajouté à partir du rapport signal sur bruit
     snr.
     """
-    xMid = (xMax-xMin)/2
-    x = np.arange(xMin, xMax+dx, dx) - xMin - xMid
+    from scipy import stats  # scipy is slow to import and only used here
+
+    x, y = generateWhiteLightSignal(xMin, xMax, dx)
+
+    return x, stats.norm.rvs(size=len(y), loc=y, scale=abs(y)/snr)
+
+def generateHeNeSignal(xMin, xMax, dx, dtype=np.float64):
+    """ Interferogramme sans bruit d'un laser He-Ne a 0.6328 microns, echantillonne
+    entre xMin et xMax.
+    """
+    x = samplePositions(xMin, xMax, dx, dtype=dtype)
+
+    return x, heNeSignal(x)
+
+def generateWhiteLightSignal(xMin, xMax, dx, dtype=np.float64):
+    """ Interferogramme sans bruit d'une source blanche visible, echantillonne
+    sur une plage de largeur xMax-xMin centree sur 0.
+    """
+    x = samplePositions(xMin, xMax, dx, centered=True, dtype=dtype)
+
+    return x, whiteLightSignal(x)
+
+def addGaussianNoise(y, snr, seed=None):
+    """ Ajoute a Y un bruit gaussien d'ecart type abs(y)/snr. La meme graine
+    (seed) donne toujours la meme realisation du bruit.
+    """
+    return gaussianNoise(y, snr, np.random.default_rng(seed))
+
+
+# Les fonctions suivantes écrivent leur résultat dans le tableau "out" fourni
+# par l'appelant, sans tableau temporaire de la taille des données. Si "out"
+# n'est pas fourni, il est créé avec le même type que x (float32 ou float64).
+
+def samplePositions(xMin, xMax, dx, centered=False, dtype=np.float64):
+    """ Memes positions que np.arange(xMin, xMax+dx, dx). Si centered, les
+    positions sont decalees pour que la plage soit centree sur 0.
+    """
+    x = np.arange(ceil((xMax+dx-xMin)/dx), dtype=dtype)
+    x *= dx
+    x += -(xMax-xMin)/2 if centered else xMin
+    return x
+
+def heNeSignal(x, out=None):
+    """ cos(2 pi x/0.6328), l'interferogramme d'un laser He-Ne. """
+    out = np.multiply(x, 2 * np.pi / 0.6328, out=out)
+    return np.cos(out, out=out)
 
+def whiteLightSignal(x, out=None, work=None):
+    """ Interferogramme d'une source blanche visible (voir
+    generateWhiteLightSignal). "work" est un second tableau de travail de la
+    taille de x.
+    """
     k1 = 1/0.4
     k2 = 1/0.8
-    y = 1 + np.exp(-x*x/4)*(np.sin(2*np.pi * (k1+k2)*x/2)/x * np.sin(2 * np.pi * (k1-k2)*x/2))
-    y[x==0] = 1
 
-    return x, stats.norm.rvs(size=len(y), loc=y, scale=abs(y)/snr)
+    out = np.multiply(x, np.pi * (k1+k2), out=out)
+    np.sin(out, out=out)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(out, x, out=out)
+
+    work = np.multiply(x, np.pi * (k1-k2), out=work)
+    np.sin(work, out=work)
+    out *= work
+
+    np.multiply(x, x, out=work)
+    work *= -1/4
+    np.exp(work, out=work)
+    out *= work
+    out += 1
+
+    # x est trié, la position 0 est trouvée sans masque booléen
+    zero = np.searchsorted(x, x.dtype.type(0))
+    if zero < len(x) and x[zero] == 0:
+        out[zero] = 1
+    return out
+
+def gaussianNoise(y, snr, rng, out=None):
+    """ Y plus un bruit gaussien d'ecart type abs(y)/snr tire du generateur
+    numpy.random.Generator "rng". Comme la loi normale est symetrique,
+    y*n a la meme distribution que abs(y)*n.
+
+    "out" peut avoir la forme (K, N) pour un y de N points: les K réalisations
+    du bruit sont alors tirées en une seule fois, sans boucle.
+    """
+    if out is None:
+        out = np.empty_like(y)
+    rng.standard_normal(dtype=out.dtype, out=out)
+    out *= y
+    out *= 1/snr
+    out += y
+    return out
+
+def synthesizeInterferogram(spectralDensity, xMin, xMax, dx, centered=False, maxWavenumber=None,
+                            tolerance=1e-9):
+    """ Interferogramme d'une source definie par son spectre, echantillonne
+    comme samplePositions(xMin, xMax, dx, centered). Au lieu d'additionner
+    un cosinus par frequence du spectre pour chaque position (O(N·M)), le
+    spectre est echantillonne sur la grille de frequences d'une FFT de
+    longueur L et l'interferogramme est obtenu par une seule FFT inverse
+    reelle (irfft) en O(L log L).
+
+    spectralDensity(sigma, width) retourne la densite spectrale aux nombres
+    d'onde sigma (µm⁻¹), convoluee par une gaussienne d'ecart type "width"
+    (µm⁻¹). La FFT inverse rend l'interferogramme periodique de periode L·dx:
+    l'elargissement multiplie l'interferogramme par l'enveloppe
+    exp(-a x²), a = 2π²width², qui eteint ses copies decalees de L·dx.
+    width est lie a la plage, a R² = 2 ou R est la plus grande distance
+    |x| a la difference de marche nulle, et l'enveloppe est ensuite
+    compensee exactement en multipliant par exp(a x²). L est choisi pour que
+    la copie la plus proche, compensee, contribue au plus
+    exp(-a L·dx (L·dx - 2R)) <= tolerance: L vaut environ 4.4 R/dx, sans
+    limite qui degraderait l'interferogramme loin de la difference de marche
+    nulle.
+
+    Le spectre est evalue jusqu'a maxWavenumber (par defaut, la frequence de
+    Nyquist 1/2/dx), plus 8 width pour la queue de l'elargissement. Les
+    frequences au-dela de la frequence de Nyquist sont repliees dans la bande
+    comme le ferait l'echantillonnage: un pas trop grand donne un spectre
+    replie (aliasing), pas un spectre vide.
+
+    L'interferogramme est normalise a 1 a la difference de marche nulle.
+    """
+    x = samplePositions(xMin, xMax, dx, centered=centered)
+    N = len(x)
+    R = max(abs(x[0]), abs(x[-1]), dx)
+    a = 2/R**2
+    width = np.sqrt(a/2)/np.pi
+    # a P (P - 2R) = ln(1/tolerance) pour la periode P = L·dx
+    period = R*(1 + np.sqrt(1 + np.log(1/tolerance)/(a*R**2)))
+    L = nextFastLength(max(ceil(period/dx), N + 1))
+    dSigma = 1/(L*dx)
+    K = L//2 + 1
+    if maxWavenumber is not None:
+        K = max(K, ceil((maxWavenumber + 8*width)/dSigma) + 1)
+    sigma = np.arange(K)*dSigma
+
+    density = np.asarray(spectralDensity(sigma, width), dtype=np.float64)
+    total = density.sum()
+    if total == 0:
+        return x, np.zeros(N)
+
+    # Le dephasage exp(2πi sigma x0) place le premier echantillon en x0
+    terms = density*np.exp(2j*np.pi*x[0]*sigma)
+
+    if K > L//2 + 1:
+        # exp(2πi k n/L) est periodique en k de periode L et la partie reelle
+        # de C·exp(2πi k n/L) est celle de conj(C)·exp(2πi (L-k) n/L)
+        bins = np.arange(K) % L
+        mirrored = bins > L//2
+        bins[mirrored] = L - bins[mirrored]
+        np.conjugate(terms, out=terms, where=mirrored)
+        terms = (np.bincount(bins, terms.real, minlength=L//2 + 1)
+                 + 1j*np.bincount(bins, terms.imag, minlength=L//2 + 1))
+
+    # irfft compte deux fois les frequences qui ont une frequence negative,
+    # soit toutes sauf la valeur DC et la frequence de Nyquist (L pair)
+    terms[0] *= 2
+    if L % 2 == 0:
+        terms[L//2] *= 2
+    y = np.fft.irfft(terms, L)[:N]
+
+    # Valeur en x=0: la somme des cosinus
+    y *= L/2/total
+
+    # Compensation de l'enveloppe de l'elargissement, au plus e² en x=±R
+    envelope = np.multiply(x, x)
+    envelope *= a
+    y *= np.exp(envelope, out=envelope)
+    return x, y
@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
 import sys
 from math import ceil
+from random import randrange
 from time import sleep
 
 from PyQt5 import QtCore, QtWidgets
 
 import config as cfg
+from compute_worker import ComputeWorker
+from pipeline import InterferogramPipeline, RealizationBudget
+from prefetch import Prefetcher, neighbour_ticks
+from session import SpectrumSession
+import sources
 from widgets.sliders import HorizontalParameterSlider, HorizontalLogarithmicParameterSlider
 from widgets.figures import InterferogramDynamicCanvas, FFTDynamicCanvas
-import widgets.figures
 
 
 class MainWindow(QtWidgets.QWidget):
@@ -16,7 +21,28 @@ class MainWindow(QtWidgets.QWidget):
     def __init__(self, parent=None, *args):
         super(QtWidgets.QWidget, self).__init__(*args)
 
-        widgets.figures.block_generation = True
+        self.session = SpectrumSession()
+        self.session.blocked = True
+        self.pipeline = InterferogramPipeline(cfg.pipeline_cache["entries"], cfg.pipeline_cache["megabytes"]*1e6,
+                cfg.monte_carlo["percentiles"], self.wavelengthGrids())
+        self.realization_budget = RealizationBudget(cfg.monte_carlo["frame_time"], cfg.monte_carlo["minimum"],
+                cfg.monte_carlo["maximum"], cfg.monte_carlo["megabytes"]*1e6)
+        self.seed = randrange(2**32)
+        self.displayed_request = None
+        self.slider_ticks = None
+        self.moved_slider = None
+        self.compute_worker = ComputeWorker(self.pipeline.compute_frame)
+        self.compute_worker.result_ready.connect(self.displayResult)
+        self.compute_worker.counters_changed.connect(self.updateComputeStatus)
+        self.compute_worker.compute_failed.connect(self.showComputeError)
+        self.compute_error = None
+        self.compute_worker.start()
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.compute_worker.stop)
+        self.prefetcher = Prefetcher(self.compute_worker.busy, cfg.prefetch["megabytes"]*1e6,
+                wavelength_grids=self.wavelengthGrids())
+        self.prefetcher.start(QtCore.QThread.LowPriority)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.prefetcher.stop)
+
         # The order of creation of widgets is important, some values must
         # be initialized before others
         self.step_slider = HorizontalParameterSlider(self, "Pas")
@@ -24,22 +50,37 @@ class MainWindow(QtWidgets.QWidget):
         self.noise_slider = HorizontalLogarithmicParameterSlider(self, "SNR")
         self.parameter_sliders = [self.step_slider, self.interval_slider, self.noise_slider]
 
-        self.fft = FFTDynamicCanvas(self, figsize=(8, 6), dpi=100)
-        self.interferogram = InterferogramDynamicCanvas(self, figsize=(8, 6), dpi=100)
+        self.fft = FFTDynamicCanvas(self, self.session, blit=cfg.blit_figures, figsize=(8, 6), dpi=100)
+        self.interferogram = InterferogramDynamicCanvas(self, self.session, blit=cfg.blit_figures, figsize=(8, 6),
+                dpi=100)
+
+        # One radio button per source of the registry
+        self.sourceLayout = QtWidgets.QHBoxLayout()
+        self.source_radios = {}
+        for source, light_source in sources.registry.items():
+            radio = QtWidgets.QRadioButton(light_source.label)
+            radio.toggled.connect(self.updateAll)
+            self.source_radios[source] = radio
+            self.sourceLayout.addWidget(radio)
+        next(iter(self.source_radios.values())).toggle()
 
-        self.HeNesource_radio = QtWidgets.QRadioButton("Source HeNe")
-        self.HeNesource_radio.toggle()
-        self.HeNesource_radio.toggled.connect(self.updateAll)
-        self.whitesource_radio = QtWidgets.QRadioButton("Source de lumière blanche")
-        self.whitesource_radio.toggled.connect(self.updateAll)
         self.radioLayout = QtWidgets.QHBoxLayout()
-        self.radioLayout.addWidget(self.HeNesource_radio)
-        self.radioLayout.addWidget(self.whitesource_radio)
+        self.window_selector = QtWidgets.QComboBox()
+        for window, name in cfg.apodization_windows.items():
+            self.window_selector.addItem(name, window)
+        self.window_selector.currentIndexChanged.connect(self.updateFigures)
+        self.radioLayout.addWidget(self.window_selector)
         fft_axis_toggle_button = QtWidgets.QPushButton("Longueurs d'onde/Fréquences")
         self.radioLayout.addWidget(fft_axis_toggle_button)
+        self.monte_carlo_checkbox = QtWidgets.QCheckBox("Moyenne de réalisations")
+        self.monte_carlo_checkbox.toggled.connect(self.updateFigures)
+        self.radioLayout.addWidget(self.monte_carlo_checkbox)
 
         refresh_data_button = QtWidgets.QPushButton("Générer de nouvelles données")
-        refresh_data_button.clicked.connect(self.updateFigures)
+        refresh_data_button.clicked.connect(self.generateNewData)
+        self.compute_status_label = QtWidgets.QLabel()
+        self.updateComputeStatus()
+        self.spectral_spacing_label = QtWidgets.QLabel()
 
         self.mainLayout = QtWidgets.QVBoxLayout()
         self.mainLayout.addWidget(self.interferogram)
@@ -47,15 +88,21 @@ class MainWindow(QtWidgets.QWidget):
         self.mainLayout.addLayout(self.step_slider)
         self.mainLayout.addLayout(self.interval_slider)
         self.mainLayout.addLayout(self.noise_slider)
+        self.mainLayout.addLayout(self.sourceLayout)
         self.mainLayout.addLayout(self.radioLayout)
         self.mainLayout.addLayout(self.radioLayout)
         self.mainLayout.addWidget(refresh_data_button)
+        self.statusLayout = QtWidgets.QHBoxLayout()
+        self.statusLayout.addWidget(self.spectral_spacing_label)
+        self.statusLayout.addWidget(self.compute_status_label)
+        self.mainLayout.addLayout(self.statusLayout)
 
         self.setLayout(self.mainLayout)
         self.setWindowTitle("Effets des paramètres de l'interférogramme sur sa transformée de Fourier")
 
         fft_axis_toggle_button.clicked.connect(self.fft.toggle_xaxis_type)
-        fft_axis_toggle_button.clicked.connect(self.updateFiguresAxis)
+        fft_axis_toggle_button.clicked.connect(self.updateSpectrumAxis)
+        fft_axis_toggle_button.clicked.connect(lambda: self.updateFiguresAxis())
         fft_axis_toggle_button.clicked.connect(self.fft.draw_frame)
 
 
@@ -63,50 +110,174 @@ class MainWindow(QtWidgets.QWidget):
         self.updateSlidersRanges()
         self.readSliderValues()
 
-        widgets.figures.block_generation = False
+        self.session.blocked = False
         self.updateFigures()
 
         for slider in self.parameter_sliders:
             slider.updateSliderLabel()
 
+    def wavelengthGrids(self):
+        if not cfg.wavelength_resampling["enabled"]:
+            return None
+        return {source: (*limits, cfg.wavelength_resampling["points"])
+                for source, limits in cfg.fft_xaxis_limits["wavelengths"].items()}
+
     def updateAll(self):
+        # The prefetched frames are for the other source
+        self.prefetcher.cancel()
         self.updateSourceUsed()
         self.updateSlidersRanges()
         self.readSliderValues()
         self.updateFigures()
 
     def updateSourceUsed(self):
-        if self.HeNesource_radio.isChecked():
-            self.source = "HeNe"
-        elif self.whitesource_radio.isChecked(): 
-            self.source = "WhiteLight"
-        else:
-            raise ValueError("Unhandled error: one of the source type radio button is not handled")
+        for source, radio in self.source_radios.items():
+            if radio.isChecked():
+                self.source = source
+                return
+        raise ValueError("Unhandled error: one of the source type radio button is not handled")
 
     def updateSlidersRanges(self):
         for slider in self.parameter_sliders:
             slider.changeSliderRange(cfg.sources_sliders[self.source])
 
     def readSliderValues(self):
-        self.interferogram_parameters = {
-                "Pas": self.step_slider.slider.value()/self.step_slider.scale,
-                "Plage": self.interval_slider.slider.value()/self.interval_slider.scale,
-                "SNR": int(self.noise_slider.base**(self.noise_slider.slider.value()/self.noise_slider.scale))
+        ticks = tuple(slider.slider.value() for slider in self.parameter_sliders)
+
+        # The direction of the last movement orders the prefetched positions
+        if self.slider_ticks is not None:
+            moved = [i for i, (new, old) in enumerate(zip(ticks, self.slider_ticks)) if new != old]
+            if len(moved) == 1:
+                self.moved_slider = (moved[0], 1 if ticks[moved[0]] > self.slider_ticks[moved[0]] else -1)
+
+        self.slider_ticks = ticks
+        self.interferogram_parameters = self.parametersFromTicks(ticks)
+
+    def parametersFromTicks(self, ticks):
+        pas, plage, snr = ticks
+        return {
+                "Pas": pas/self.step_slider.scale,
+                "Plage": plage/self.interval_slider.scale,
+                "SNR": int(self.noise_slider.base**(snr/self.noise_slider.scale))
             }
 
+    def currentRequest(self):
+        # The worker only keeps the newest request, so a snapshot of the
+        # parameters is sent instead of letting the thread read the sliders
+        return dict(self.interferogram_parameters, source=self.source, seed=self.seed, xaxis=self.fft.xaxis_type,
+                window=self.window_selector.currentData(), realizations=self.realizationsCount())
+
+    def prefetchKey(self, request, ticks):
+        return (ticks, request["source"], request["seed"], request["window"], request["xaxis"])
+
     def updateFigures(self):
-        self.interferogram.generate_data()
-        self.fft.compute_fft()
+        if self.session.blocked:
+            return
+
+        request = self.currentRequest()
+        if not request["realizations"]:
+            frame = self.prefetcher.take(self.prefetchKey(request, self.slider_ticks))
+            if frame is not None:
+                # The result of an older request still computed would replace this frame
+                self.compute_worker.cancel()
+                self.showFrame(frame)
+                return
+
+        self.compute_worker.request(request)
+
+    def prefetchNeighbours(self):
+        request = self.currentRequest()
+        if request["realizations"]:
+            return
+
+        sliders = cfg.sources_sliders[self.source]
+        ranges = [(sliders[slider.key]["minimum"], sliders[slider.key]["maximum"], sliders[slider.key]["step"])
+                for slider in self.parameter_sliders]
+
+        requests = []
+        for ticks in neighbour_ticks(self.slider_ticks, ranges, self.moved_slider, cfg.prefetch["radius"]):
+            neighbour = dict(request, **self.parametersFromTicks(ticks))
+            requests.append((self.prefetchKey(neighbour, ticks), neighbour))
+        self.prefetcher.prefetch(requests)
+
+    def realizationsCount(self):
+        if not self.monte_carlo_checkbox.isChecked():
+            return 0
+
+        samples = ceil(self.interferogram_parameters["Plage"]/self.interferogram_parameters["Pas"]) + 1
+        return self.realization_budget.count(samples)
+
+    def generateNewData(self):
+        self.seed = randrange(2**32)
+        self.updateFigures()
+
+    def displayResult(self):
+        result = self.compute_worker.take_result()
+        if result is not None:
+            self.showFrame(result)
+
+    def showFrame(self, result):
+        self.updateFiguresAxis(result["request"]["source"])
+        self.session.set_interferogram(*result["interferogram"])
+
+        # The spectrum axis may have been toggled while the result was computed
+        if result["request"]["xaxis"] == self.fft.xaxis_type:
+            self.displayed_request = result["request"]
+            self.session.set_spectrum(*result["spectrum"])
+        else:
+            self.displayed_request = dict(result["request"], xaxis=self.fft.xaxis_type)
+            self.setSpectrum()
+
+        realizations = self.displayed_request["realizations"]
+        spacing_text = "Espacement du spectre: {:.3g} µm⁻¹".format(result["spectral spacing"])
+        if realizations:
+            spacing_text += " | Réalisations: {}".format(realizations)
+        self.spectral_spacing_label.setText(spacing_text)
 
-        self.updateFiguresAxis()
         self.interferogram.draw_frame()
         self.fft.draw_frame()
 
-    def updateFiguresAxis(self):
-        self.interferogram.rescale_axis(cfg.interferogram_xaxis_limits[self.source], 
-                cfg.zoomed_interferogram_xaxis_limits[self.source])
-        self.fft.rescale_axis(cfg.fft_xaxis_limits[self.fft.xaxis_type][self.source],
-                cfg.zoomed_fft_xaxis_limits[self.fft.xaxis_type][self.source])
+        if realizations:
+            # A frame that was too slow or fast enough for more realizations is
+            # computed again with the adjusted number of realizations
+            samples = len(result["interferogram"][0])
+            self.realization_budget.update(realizations, samples, result["realizations time"])
+            if self.realizationsCount() != realizations:
+                self.updateFigures()
+        else:
+            self.prefetchNeighbours()
+
+    def updateFiguresAxis(self, source=None):
+        if source is None:
+            source = self.source
+
+        self.interferogram.rescale_axis(cfg.interferogram_xaxis_limits[source],
+                cfg.zoomed_interferogram_xaxis_limits[source])
+        self.fft.rescale_axis(cfg.fft_xaxis_limits[self.fft.xaxis_type][source],
+                cfg.zoomed_fft_xaxis_limits[self.fft.xaxis_type][source])
+
+    def updateSpectrumAxis(self):
+        if self.displayed_request is None:
+            return
+
+        # Only the axis stage of the pipeline is computed, the spectrum is cached
+        self.displayed_request = dict(self.displayed_request, xaxis=self.fft.xaxis_type)
+        self.setSpectrum()
+
+    def setSpectrum(self):
+        self.session.set_spectrum(*self.pipeline.spectrum_axis(self.displayed_request))
+
+    def updateComputeStatus(self):
+        text = "Calculs affichés: {} | Calculs abandonnés: {} | Préchargés: {} | Cache: {:.0f} Mo".format(
+                self.compute_worker.finished_count, self.compute_worker.dropped_count, self.prefetcher.frames.hits,
+                (self.pipeline.nbytes() + self.prefetcher.frames.nbytes)/1e6)
+        if self.compute_worker.failed_count:
+            text += " | Calculs échoués: {} ({})".format(self.compute_worker.failed_count, self.compute_error)
+        self.compute_status_label.setText(text)
+
+    def showComputeError(self, message):
+        self.compute_error = message
+        self.updateComputeStatus()
 
 
 app = QtWidgets.QApplication(sys.argv)
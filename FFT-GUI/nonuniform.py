@@ -0,0 +1,110 @@
+import json
+from math import pi, sqrt
+
+import numpy as np
+
+from compute_fft import nextFastLength
+
+""" Transformée de Fourier d'interférogrammes dont les positions ne sont pas
+équidistantes, comme les positions absolues mesurées par Michelson-GUI
+(data_acquirer.py): le moteur a du jeu et saute parfois un pas, alors que
+fourierTransformInterferogram suppose que dx = x[1]-x[0] partout.
+
+La transformée directe (directFourierTransform) coûte O(N·K) pour N points
+et K fréquences. nonUniformFourierTransform calcule le même spectre en
+O(N + K log K) par interpolation gaussienne sur une grille régulière
+suréchantillonnée suivie d'une FFT (NUFFT de type 1, Greengard et Lee 2004).
+"""
+
+
+def loadMichelsonData(path, positions="absolute positions"):
+    """ Lit un fichier JSON sauvegardé par Michelson-GUI et retourne les
+    tableaux (x, y) des positions (µm) et des voltages, triés par position.
+    "positions" choisit entre les positions absolues mesurées et les
+    positions relatives.
+    """
+    with open(path) as file:
+        data = json.load(file)
+
+    x = np.asarray(data[positions], dtype=np.float64)
+    y = np.asarray(data["voltages"], dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+
+    order = np.argsort(x, kind="stable")
+    return x[order], y[order]
+
+def spectrumFrequencies(x, df=None, fMax=None):
+    """ Fréquences f_k = k·df (µm⁻¹) du spectre des positions x, de 0 à fMax.
+    Par défaut, df = 1/(xMax-xMin) est la résolution physique et fMax est la
+    fréquence de Nyquist 1/2/∆x du pas médian ∆x.
+    """
+    if df is None:
+        df = 1/(x.max() - x.min())
+    if fMax is None:
+        fMax = 1/2/np.median(np.diff(np.sort(x)))
+    return np.arange(int(fMax/df) + 1)*df
+
+def directFourierTransform(x, y, frequencies, blockSize=4000000):
+    """ Transformée de Fourier directe: S(f) = somme de y·exp(-2πi f (x - x[0])).
+    Les fréquences sont traitées par blocs pour que la matrice des phases ne
+    dépasse pas blockSize éléments.
+    """
+    x = np.asarray(x, dtype=np.float64) - x[0]
+    y = np.asarray(y, dtype=np.float64)
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+
+    spectrum = np.empty(len(frequencies), dtype=np.complex128)
+    step = max(blockSize//max(len(x), 1), 1)
+    for start in range(0, len(frequencies), step):
+        phases = np.multiply.outer(frequencies[start:start+step], -2*pi*x)
+        spectrum[start:start+step] = np.exp(1j*phases) @ y
+    return spectrum
+
+def nonUniformFourierTransform(x, y, df=None, fMax=None, spreadWidth=12, blockSize=65536):
+    """ Même spectre que directFourierTransform(x, y, f_k) aux fréquences
+    f_k = k·df de spectrumFrequencies, calculé par une NUFFT de type 1.
+
+    Chaque point est étalé par une gaussienne sur 2·spreadWidth points d'une
+    grille régulière suréchantillonnée d'un facteur 2 au moins, la grille est
+    transformée par une FFT réelle et l'effet de la gaussienne est divisé du
+    spectre. Avec spreadWidth=12, l'erreur relative est de l'ordre de 1e-12.
+    Les points sont étalés par blocs de blockSize points.
+
+    Le résultat a la même forme que fourierTransformRealInterferogram:
+    (longueurs d'onde avec NaN pour la valeur DC, fréquences, spectre, df).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    frequencies = spectrumFrequencies(x, df, fMax)
+    df = frequencies[1] - frequencies[0] if len(frequencies) > 1 else 1/(x.max() - x.min())
+
+    # Les fréquences -K..K sont couvertes par M points, la grille en a R·M
+    M = 2*len(frequencies)
+    gridSize = nextFastLength(2*M)
+    R = gridSize/M
+    tau = pi*spreadWidth/(M**2*R*(R - 0.5))
+
+    # exp(-2πi k df (x-x0)) = exp(-i k t) avec t = 2π df (x-x0), périodique en 2π
+    t = np.mod(2*pi*df*(x - x[0]), 2*pi)
+    h = 2*pi/gridSize
+    offsets = np.arange(-spreadWidth + 1, spreadWidth + 1)
+
+    grid = np.zeros(gridSize)
+    for start in range(0, len(t), blockSize):
+        block = t[start:start+blockSize]
+        nearest = np.floor(block/h).astype(np.intp)
+        indices = nearest[:, None] + offsets
+        distances = block[:, None] - indices*h
+        weights = np.exp(distances**2*(-1/(4*tau)))
+        weights *= y[start:start+blockSize, None]
+        grid += np.bincount(np.mod(indices, gridSize).ravel(), weights.ravel(), minlength=gridSize)
+
+    k = np.arange(len(frequencies))
+    spectrum = np.fft.rfft(grid)[:len(frequencies)]
+    spectrum *= sqrt(pi/tau)/gridSize*np.exp(k**2*tau)
+
+    wavelengths = np.empty_like(frequencies)
+    wavelengths[0] = np.nan
+    np.divide(1, frequencies[1:], out=wavelengths[1:])
+    return (wavelengths, frequencies, spectrum, df)
@@ -0,0 +1,304 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from compute_fft import fourierTransformRealInterferogram, resampleToWavelengths, wavelengthResamplingIndex
+import generate_data
+import sources
+
+
+def allocated_bytes(value):
+    """ Memory allocated by the numpy arrays of a value. Views are not counted
+    since their memory belongs to another array.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes if value.base is None else 0
+    if isinstance(value, (tuple, list)):
+        return sum(allocated_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(allocated_bytes(item) for item in value.values())
+    return 0
+
+
+def retained_bytes(value, seen=None):
+    """ Memory kept alive by the numpy arrays of a value. A view keeps the whole array it belongs to alive, so the
+    array owning the memory is counted instead, once.
+    """
+    if seen is None:
+        seen = set()
+
+    if isinstance(value, np.ndarray):
+        while isinstance(value.base, np.ndarray):
+            value = value.base
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(retained_bytes(item, seen) for item in value)
+    if isinstance(value, dict):
+        return sum(retained_bytes(item, seen) for item in value.values())
+    return 0
+
+
+class StageCache:
+    """
+    Least recently used cache of the values computed by one pipeline stage.
+
+    The oldest values are evicted as soon as the cache holds more than "max_entries" values or more than "max_bytes"
+    bytes of arrays. The most recent value is always kept, even when it is larger than "max_bytes" by itself. The size
+    of a value is measured by the "size" function (see allocated_bytes and retained_bytes).
+    """
+
+    def __init__(self, max_entries=16, max_bytes=128e6, size=allocated_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = size
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._values
+
+    def get(self, key):
+        """ Returns the value cached for the key or None. """
+        with self._lock:
+            if key not in self._values:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._values.move_to_end(key)
+            return self._values[key][0]
+
+    def put(self, key, value):
+        size = self.size(value)
+        with self._lock:
+            if key in self._values:
+                self.nbytes -= self._values.pop(key)[1]
+            self._values[key] = (value, size)
+            self.nbytes += size
+
+            while len(self._values) > 1 and (len(self._values) > self.max_entries or self.nbytes > self.max_bytes):
+                self.nbytes -= self._values.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.nbytes = 0
+
+
+class InterferogramPipeline:
+    """
+    Computes the figures data as a chain of cached stages:
+
+        signal   (source, Plage, Pas)        noiseless interferogram
+        noise    + (SNR, seed)               noisy and normalized interferogram
+        spectrum + window                    one-sided amplitude spectrum of the apodized interferogram
+        axis     + xaxis type                spectrum against wavelengths (nm) or frequencies (µm^-1)
+
+    With "wavelength_grids", a dictionary of (minimum, maximum, points) per source, the spectrum against wavelengths is
+    resampled on that uniform grid of wavelengths (see compute_fft.wavelengthResamplingIndex) instead of being given at
+    the wavelengths of the spectrum points, which crowd at short wavelengths.
+
+    When a request asks for more than zero noise realizations, the displayed spectrum is instead the mean amplitude of
+    that many realizations, with a percentile band:
+
+        monte carlo       + realizations     mean and percentiles of the spectra of the realizations
+        monte carlo axis  + xaxis type       same against the spectrum axis
+
+    Each stage only recomputes when its own key changes: changing the SNR reuses the cached signal and toggling the
+    spectrum axis reuses the cached spectrum. Requests are dictionaries with the "source", "Pas", "Plage", "SNR",
+    "seed", "window", "realizations" and "xaxis" keys.
+    """
+
+    stages = ["signal", "noise", "spectrum", "axis", "monte carlo", "monte carlo axis"]
+
+    def __init__(self, max_entries=16, max_bytes=128e6, band_percentiles=(5, 95), wavelength_grids=None):
+        self.caches = {stage: StageCache(max_entries, max_bytes) for stage in self.stages}
+        self.band_percentiles = band_percentiles
+        self.wavelength_grids = wavelength_grids
+
+    def signal(self, request):
+        key = (request["source"], request["Plage"], request["Pas"])
+        return self._cached("signal", key, lambda: self._generate_signal(*key))
+
+    def noisy_signal(self, request):
+        key = self._noise_key(request)
+        return self._cached("noise", key, lambda: self._add_noise(request))
+
+    def spectrum(self, request):
+        key = self._spectrum_key(request)
+        return self._cached("spectrum", key, lambda: self._compute_spectrum(request))
+
+    def axis(self, request):
+        key = self._spectrum_key(request) + (request["xaxis"],)
+        return self._cached("axis", key, lambda: self._transform_axis(request))
+
+    def monte_carlo(self, request):
+        key = self._spectrum_key(request) + (request["realizations"],)
+        return self._cached("monte carlo", key, lambda: self._compute_monte_carlo(request))
+
+    def monte_carlo_axis(self, request):
+        key = self._spectrum_key(request) + (request["realizations"], request["xaxis"])
+        return self._cached("monte carlo axis", key, lambda: self._transform_monte_carlo_axis(request))
+
+    def spectrum_axis(self, request):
+        """ Returns the displayed spectrum of a request as (x axis, amplitudes, band). The band is the (low, high)
+        percentiles of the noise realizations, or None when the request has a single realization.
+        """
+        if request["realizations"]:
+            x, mean, low, high = self.monte_carlo_axis(request)
+            return x, mean, (low, high)
+
+        x, amplitudes = self.axis(request)
+        return x, amplitudes, None
+
+    def compute_frame(self, request):
+        """ Returns everything the figures need for a request. """
+        x = self.signal(request)[0]
+        frequencies, amplitudes, df = self.spectrum(request)
+
+        frame = {
+                "request": request,
+                "interferogram": (x, self.noisy_signal(request)),
+                "spectrum": self.spectrum_axis(request),
+                "spectral spacing": df
+            }
+        if request["realizations"]:
+            frame["realizations time"] = self.monte_carlo(request)[-1]
+        return frame
+
+    def nbytes(self):
+        return sum(cache.nbytes for cache in self.caches.values())
+
+    def _cached(self, stage, key, compute):
+        cache = self.caches[stage]
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.put(key, value)
+        return value
+
+    @staticmethod
+    def _noise_key(request):
+        return (request["source"], request["Plage"], request["Pas"], request["SNR"], request["seed"])
+
+    @classmethod
+    def _spectrum_key(cls, request):
+        return cls._noise_key(request) + (request["window"],)
+
+    @staticmethod
+    def _generate_signal(source, plage, pas):
+        try:
+            light_source = sources.registry[source]
+        except KeyError:
+            raise ValueError("Unknown source type to generate data")
+        return light_source.generate(0, plage, pas)
+
+    def _add_noise(self, request):
+        y = generate_data.addGaussianNoise(self.signal(request)[1], request["SNR"]/100, request["seed"])  # Noise is in %
+        y /= y.max()
+        return y
+
+    def _compute_spectrum(self, request):
+        x = self.signal(request)[0]
+        w, f, s, df = fourierTransformRealInterferogram(x, self.noisy_signal(request), window=request["window"])
+        return f, abs(s), df
+
+    def _transform_axis(self, request):
+        frequencies, amplitudes, df = self.spectrum(request)
+        return self._spectrum_axis(request, frequencies, df, amplitudes)
+
+    def _compute_monte_carlo(self, request):
+        x, y = self.signal(request)
+        start = time.perf_counter()
+
+        # All the realizations are drawn as one (realizations, N) array and transformed by a single FFT along the
+        # last axis, there is no loop over the realizations
+        realizations = np.empty((request["realizations"], len(y)))
+        generate_data.gaussianNoise(y, request["SNR"]/100, np.random.default_rng(request["seed"]), out=realizations)
+        realizations /= realizations.max(axis=1, keepdims=True)
+
+        w, f, s, df = fourierTransformRealInterferogram(x, realizations, window=request["window"])
+        amplitudes = abs(s)
+        low, high = np.percentile(amplitudes, self.band_percentiles, axis=0)
+
+        return f, df, amplitudes.mean(axis=0), low, high, time.perf_counter() - start
+
+    def _transform_monte_carlo_axis(self, request):
+        frequencies, df, mean, low, high, elapsed = self.monte_carlo(request)
+        return self._spectrum_axis(request, frequencies, df, mean, low, high)
+
+    def _spectrum_axis(self, request, frequencies, df, *amplitudes):
+        xaxis = request["xaxis"]
+        if xaxis == "wavelengths" and self.wavelength_grids is not None:
+            # The index only depends on the spectrum length and spacing, it is shared by every frame of a slider position
+            index = wavelengthResamplingIndex(len(frequencies), df, *self.wavelength_grids[request["source"]])
+            resampled = [resampleToWavelengths(values, index) for values in amplitudes]
+            return (resampled[0][0],) + tuple(values for grid, values in resampled)
+        elif xaxis == "wavelengths":
+            # The DC value has no wavelength, it is skipped
+            return (1000/frequencies[1:],) + tuple(values[1:] for values in amplitudes)
+        elif xaxis == "frequencies":
+            return (frequencies,) + amplitudes
+        else:
+            raise ValueError("Unknown spectrum axis type")
+
+
+class RealizationBudget:
+    """
+    Number of noise realizations of the Monte-Carlo spectra that keeps their computation within "frame_time" seconds.
+
+    The cost of one sample of one realization is measured on the computed frames ("update") and the number of
+    realizations ("count") is a power of two between "minimum" and "maximum". It only doubles when the doubled number is
+    expected to take less than "grow_ratio" of the budget and only halves when the budget is exceeded, so the number
+    does not flip between two values from one frame to the next. The realizations are also limited to "max_bytes" of
+    memory.
+    """
+
+    # Bytes per sample of one realization: the realization, its complex spectrum (half as long) and its amplitudes
+    bytes_per_sample = 32
+
+    def __init__(self, frame_time=0.15, minimum=8, maximum=512, max_bytes=256e6, grow_ratio=0.7):
+        self.frame_time = frame_time
+        self.minimum = minimum
+        self.maximum = maximum
+        self.max_bytes = max_bytes
+        self.grow_ratio = grow_ratio
+
+        self.realizations = minimum
+        self.sample_time = None
+
+    def update(self, realizations, samples, elapsed):
+        """ Records that "realizations" realizations of "samples" samples were computed in "elapsed" seconds. """
+        sample_time = elapsed/(realizations*samples)
+        if self.sample_time is None:
+            self.sample_time = sample_time
+        else:
+            self.sample_time += (sample_time - self.sample_time)/2
+
+    def count(self, samples):
+        """ Number of realizations for interferograms of "samples" samples. """
+        limit = max(self.minimum, min(self.maximum, self.max_bytes/(self.bytes_per_sample*samples)))
+
+        if self.sample_time is not None:
+            frame_time = lambda realizations: realizations*samples*self.sample_time
+            while self.realizations > self.minimum and frame_time(self.realizations) > self.frame_time:
+                self.realizations //= 2
+            while self.realizations*2 <= limit and frame_time(self.realizations*2) < self.grow_ratio*self.frame_time:
+                self.realizations *= 2
+
+        while self.realizations > limit:
+            self.realizations //= 2
+        return self.realizations
@@ -0,0 +1,98 @@
+import threading
+
+from PyQt5 import QtCore
+
+from pipeline import InterferogramPipeline, StageCache, retained_bytes
+
+
+def neighbour_ticks(ticks, ranges, moved=None, radius=2):
+    """
+    Slider positions around "ticks", the integer values of the sliders, in the order they should be prefetched.
+
+    "ranges" holds the (minimum, maximum, step) of each slider, as in config.sources_sliders. Positions up to "radius"
+    steps away from "ticks" on a single slider are returned, the nearest first. "moved" is the (slider index, +1 or -1)
+    of the last slider movement: the positions further in that direction come first since scrubbing usually continues.
+    """
+    def priority(neighbour):
+        index, sign, distance = neighbour
+        return (index, sign) != moved, distance
+
+    neighbours = []
+    for index, (minimum, maximum, step) in enumerate(ranges):
+        for sign in (1, -1):
+            for distance in range(1, radius + 1):
+                value = ticks[index] + sign*distance*step
+                if minimum <= value <= maximum:
+                    neighbours.append((index, sign, distance))
+
+    positions = []
+    for index, sign, distance in sorted(neighbours, key=priority):
+        position = list(ticks)
+        position[index] += sign*distance*ranges[index][2]
+        positions.append(tuple(position))
+    return positions
+
+
+class Prefetcher(QtCore.QThread):
+    """
+    Thread that computes the frames of the slider positions next to the displayed one while the compute worker is idle,
+    so that moving a slider by one step can display a frame immediately.
+
+    "prefetch" replaces the list of (key, request) to compute, "take" returns the frame computed for a key or None. The
+    frames are kept in a cache of at most "max_bytes" bytes, which measures the whole arrays kept alive by the frames.
+    "cancel" drops the requests not computed yet and the cached frames, for instance when the source changes.
+    "is_busy" is a function telling when the compute worker has work, the prefetcher then waits. "wavelength_grids" must
+    be the one of the main pipeline so that the prefetched frames are the same.
+    """
+
+    def __init__(self, is_busy, max_bytes=64e6, max_entries=32, wavelength_grids=None, parent=None):
+        super().__init__(parent)
+
+        self._is_busy = is_busy
+        self._condition = threading.Condition()
+        self._requests = []
+        self._running = True
+        self._generation = 0
+
+        # A private pipeline, the prefetched requests would evict the displayed ones from the main pipeline caches.
+        # Two entries per stage let neighbouring SNR and seeds reuse the same signal.
+        self.pipeline = InterferogramPipeline(max_entries=2, max_bytes=max_bytes,
+                wavelength_grids=wavelength_grids)
+        self.frames = StageCache(max_entries, max_bytes, size=retained_bytes)
+
+    def prefetch(self, requests):
+        with self._condition:
+            self._requests = [(key, request) for key, request in requests if key not in self.frames]
+            self._condition.notify()
+
+    def take(self, key):
+        return self.frames.get(key)
+
+    def cancel(self):
+        with self._condition:
+            self._requests = []
+            self._generation += 1
+            self.frames.clear()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._running and (not self._requests or self._is_busy()):
+                    # The worker does not signal when it becomes idle, it is polled
+                    self._condition.wait(None if not self._requests else 0.02)
+                if not self._running:
+                    return
+                key, request = self._requests.pop(0)
+                generation = self._generation
+
+            frame = self.pipeline.compute_frame(request)
+
+            with self._condition:
+                if generation == self._generation:
+                    self.frames.put(key, frame)
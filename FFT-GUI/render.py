@@ -0,0 +1,167 @@
+""" Renders the figures of the interface over a sweep of one slider to numbered images, without the interface nor Qt,
+for instance to make videos for course material.
+
+    python render.py frames/ [--source HeNe] [--parameter Plage] [--frames 120] [--seed 0] [--window rectangular]
+                             [--xaxis wavelengths] [--realizations 0] [--chunk-size 8] [--workers N]
+
+The swept slider goes over its range in at most "--frames" steps while the other sliders stay at their initial value.
+Each frame stacks the interferogram figure over the spectrum figure and is saved as "frame-XXXXX.png". With "-" as the
+directory, the frames are instead written to the standard output as raw RGBA images, for a video encoder:
+
+    python render.py - --parameter Plage | ffmpeg -f rawvideo -pix_fmt rgba -s 800x1200 -r 30 -i - sweep.mp4
+
+The frames are spread over a pool of processes. A frame only depends on its parameters and the seed, so the output is
+identical from one run to the next whatever the number of processes.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.image import imsave
+import numpy as np
+
+import config as cfg
+from pipeline import InterferogramPipeline
+from session import SpectrumSession
+from sweep import slider_values
+from widgets.plots import InterferogramPlot, FFTPlot
+
+
+class OffscreenCanvas:
+    """ Provides the canvas of the plots mixins of widgets.plots with an Agg canvas. Every frame is drawn entirely. """
+
+    def attach_canvas(self):
+        FigureCanvasAgg(self.fig)
+        self.finish_layout()
+
+    def redraw(self):
+        self.fig.canvas.draw()
+
+    def limits_changed(self):
+        return True
+
+    def rgba(self):
+        return np.asarray(self.fig.canvas.buffer_rgba())
+
+
+class OffscreenInterferogram(OffscreenCanvas, InterferogramPlot):
+
+    def __init__(self, session, **kwargs):
+        InterferogramPlot.__init__(self, session, **kwargs)
+        self.attach_canvas()
+
+
+class OffscreenFFT(OffscreenCanvas, FFTPlot):
+
+    def __init__(self, session, **kwargs):
+        FFTPlot.__init__(self, session, **kwargs)
+        self.attach_canvas()
+
+
+class FrameRenderer:
+    """ Computes the frame of a request with its own pipeline and draws it on the two figures, as the interface does. """
+
+    def __init__(self, source, xaxis, figsize=(8, 6), dpi=100):
+        self.session = SpectrumSession()
+        self.interferogram = OffscreenInterferogram(self.session, figsize=figsize, dpi=dpi)
+        self.fft = OffscreenFFT(self.session, figsize=figsize, dpi=dpi)
+        if xaxis != self.fft.xaxis_type:
+            self.fft.toggle_xaxis_type()
+
+        grids = None
+        if cfg.wavelength_resampling["enabled"]:
+            grids = {source: (*cfg.fft_xaxis_limits["wavelengths"][source], cfg.wavelength_resampling["points"])}
+        self.pipeline = InterferogramPipeline(max_entries=2, wavelength_grids=grids)
+
+        self.interferogram.rescale_axis(cfg.interferogram_xaxis_limits[source],
+                cfg.zoomed_interferogram_xaxis_limits[source])
+        self.fft.rescale_axis(cfg.fft_xaxis_limits[xaxis][source], cfg.zoomed_fft_xaxis_limits[xaxis][source])
+
+    def render(self, request):
+        """ Returns the frame of the request as an RGBA image, the interferogram over the spectrum. """
+        frame = self.pipeline.compute_frame(request)
+        self.session.set_interferogram(*frame["interferogram"])
+        self.session.set_spectrum(*frame["spectrum"])
+
+        self.interferogram.draw_frame()
+        self.fft.draw_frame()
+        return np.concatenate([self.interferogram.rgba(), self.fft.rgba()])
+
+
+@lru_cache(maxsize=1)
+def process_renderer(source, xaxis):
+    """ Renderer of the current process, the figures are built once per process. """
+    return FrameRenderer(source, xaxis)
+
+
+def sweep_requests(source, parameter, frames, seed, window, xaxis, realizations):
+    """ Requests of the pipeline for the values of "parameter" over its slider range, the other parameters at the
+    initial value of their slider.
+    """
+    sliders = cfg.sources_sliders[source]
+    parameters = {name: sliders[name]["initial"]/sliders[name]["scale"] for name in ["Pas", "Plage", "SNR"]}
+    # Same conversion as the SNR slider of the interface
+    parameters["SNR"] = int(sliders["SNR"]["base"]**parameters["SNR"])
+
+    return [dict(parameters, source=source, seed=seed, window=window, xaxis=xaxis, realizations=realizations,
+                 **{parameter: value})
+            for value in slider_values(sliders[parameter], frames, log=parameter == "SNR")]
+
+
+def render_chunk(frames, directory):
+    """ Renders a list of (frame number, request). The images are saved in the directory, or returned as raw bytes
+    when it is None.
+    """
+    images = []
+    for number, request in frames:
+        image = process_renderer(request["source"], request["xaxis"]).render(request)
+        if directory is None:
+            images.append(image.tobytes())
+        else:
+            imsave(os.path.join(directory, "frame-{:05d}.png".format(number)), image)
+    return images
+
+
+def render(directory, requests, chunk_size=8, workers=None):
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    frames = list(enumerate(requests))
+    chunks = [frames[i:i+chunk_size] for i in range(0, len(frames), chunk_size)]
+
+    start = time.perf_counter()
+    rendered = 0
+    with ProcessPoolExecutor(workers) as executor:
+        # map returns the chunks in order, the raw frames are written in the order of the sweep
+        for chunk, images in zip(chunks, executor.map(render_chunk, chunks, [directory]*len(chunks))):
+            for image in images:
+                sys.stdout.buffer.write(image)
+
+            rendered += len(chunk)
+            elapsed = time.perf_counter() - start
+            print("{:6d}/{} frames  {:6.1f} frames/s".format(rendered, len(frames), rendered/elapsed),
+                  file=sys.stderr, flush=True)
+    sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory of the images, or - for raw RGBA frames on the standard output")
+    parser.add_argument("--source", default="HeNe", choices=cfg.sources_sliders.keys())
+    parser.add_argument("--parameter", default="Plage", choices=["Pas", "Plage", "SNR"], help="swept slider")
+    parser.add_argument("--frames", type=int, default=120, help="maximum number of frames")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the noise")
+    parser.add_argument("--window", default="rectangular", choices=cfg.apodization_windows.keys())
+    parser.add_argument("--xaxis", default="wavelengths", choices=["wavelengths", "frequencies"])
+    parser.add_argument("--realizations", type=int, default=0, help="number of averaged noise realizations")
+    parser.add_argument("--chunk-size", type=int, default=8, help="number of frames per task of a process")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    requests = sweep_requests(args.source, args.parameter, args.frames, args.seed, args.window, args.xaxis,
+                              args.realizations)
+    render(None if args.directory == "-" else args.directory, requests, args.chunk_size, args.workers)
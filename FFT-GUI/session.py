@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class SpectrumSession:
+    """
+    Data displayed by the figures of one window: the interferogram (x, y), the spectrum (x axis, amplitudes) and the
+    optional (low, high) band of the spectrum.
+
+    The data is copied into buffers owned by the session, which are only reallocated when the number of points
+    changes, so the displayed arrays do not depend on the lifetime of the arrays they were computed in. Each setter
+    increments a version counter that the canvases compare with the version they last drew.
+
+    While "blocked" is True (during the creation of the window), no figure is computed or drawn.
+    """
+
+    def __init__(self):
+        self.blocked = False
+
+        self.interferogram = (np.empty(0), np.empty(0))
+        self.spectrum = (np.empty(0), np.empty(0))
+        self.band = None
+        self._band_buffers = (np.empty(0), np.empty(0))
+
+        self.interferogram_version = 0
+        self.spectrum_version = 0
+
+    def set_interferogram(self, x, y):
+        self.interferogram = self._reuse(self.interferogram, (x, y))
+        self.interferogram_version += 1
+
+    def set_spectrum(self, x, amplitudes, band=None):
+        self.spectrum = self._reuse(self.spectrum, (x, amplitudes))
+        if band is None:
+            self.band = None
+        else:
+            self._band_buffers = self._reuse(self._band_buffers, band)
+            self.band = self._band_buffers
+        self.spectrum_version += 1
+
+    @staticmethod
+    def _reuse(buffers, values):
+        """ Copies the values into the buffers, allocating a new buffer only when the shape or the type changed. """
+        result = []
+        for buffer, value in zip(buffers, values):
+            value = np.asarray(value)
+            if buffer.shape != value.shape or buffer.dtype != value.dtype:
+                buffer = np.empty_like(value)
+            np.copyto(buffer, value)
+            result.append(buffer)
+        return tuple(result)
@@ -0,0 +1,148 @@
+from abc import ABC, abstractmethod
+from math import ceil
+
+import numpy as np
+
+import generate_data
+
+
+class Source(ABC):
+    """
+    Light source of the interface. "label" is the text of its radio button and "generate(xMin, xMax, dx)" returns the
+    noiseless interferogram (x, y) sampled every dx over a range of width xMax-xMin.
+    """
+
+    def __init__(self, label):
+        self.label = label
+
+    @abstractmethod
+    def generate(self, xMin, xMax, dx):
+        pass
+
+
+class AnalyticSource(Source):
+    """ Source whose interferogram is computed by a function of generate_data, such as generateHeNeSignal. """
+
+    def __init__(self, label, generator):
+        super().__init__(label)
+        self.generator = generator
+
+    def generate(self, xMin, xMax, dx):
+        return self.generator(xMin, xMax, dx)
+
+
+class SpectrumSource(Source):
+    """
+    Source defined by its spectrum. The interferogram is synthesized from "spectral_density" by a single inverse FFT
+    (see generate_data.synthesizeInterferogram), starting at zero path difference, or centered on it when "centered"
+    is True.
+    """
+
+    def __init__(self, label, centered=False):
+        super().__init__(label)
+        self.centered = centered
+
+    @abstractmethod
+    def spectral_density(self, wavenumbers, width):
+        """ Spectral density at the evenly spaced wavenumbers (µm^-1), convolved with a gaussian of standard
+        deviation "width" (µm^-1).
+        """
+
+    @abstractmethod
+    def max_wavenumber(self):
+        """ Wavenumber (µm^-1) above which the spectral density, before its convolution, is zero. """
+
+    def generate(self, xMin, xMax, dx):
+        return generate_data.synthesizeInterferogram(self.spectral_density, xMin, xMax, dx, centered=self.centered,
+                maxWavenumber=self.max_wavenumber())
+
+
+class LineSource(SpectrumSource):
+    """
+    Source with a spectrum made of gaussian lines given as (wavelength in nm, relative intensity, FWHM in nm). Each
+    line only sets the density within 8 standard deviations of its center, found by binary search on the sorted
+    wavenumbers, so the cost grows with the number of lines and not with the number of lines times the spectrum length.
+    """
+
+    def __init__(self, label, lines, centered=False):
+        super().__init__(label, centered)
+        self.lines = lines
+
+    def spectral_density(self, wavenumbers, width):
+        density = np.zeros_like(wavenumbers)
+        for wavelength, intensity, fwhm in self.lines:
+            center = 1000/wavelength
+            # A width in wavelength dλ is a width in wavenumber dλ/λ² (λ in µm). The convolution of two gaussians
+            # is a gaussian whose variance is the sum of theirs.
+            std = np.hypot(fwhm/1000/(wavelength/1000)**2/(2*np.sqrt(2*np.log(2))), width)
+
+            start, stop = np.searchsorted(wavenumbers, [center - 8*std, center + 8*std])
+            local = wavenumbers[start:stop]
+            density[start:stop] += intensity/std*np.exp(-0.5*((local - center)/std)**2)
+        return density
+
+    def max_wavenumber(self):
+        # The natural lines are narrower than 10^-5 µm^-1, 0.1 µm^-1 leaves room for their tails
+        return max(1000/wavelength for wavelength, intensity, fwhm in self.lines) + 0.1
+
+
+class TabulatedSource(SpectrumSource):
+    """
+    Source with a tabulated spectrum, such as a measured LED spectrum: "densities" is the spectral density per unit of
+    wavelength at the "wavelengths" (nm) and is interpolated linearly between them.
+    """
+
+    def __init__(self, label, wavelengths, densities, centered=True):
+        super().__init__(label, centered)
+
+        # Density per wavelength to density per wavenumber: S(σ) = D(λ) dλ/dσ = D(λ) λ², sorted by wavenumber
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        order = np.argsort(1000/wavelengths)
+        self.wavenumbers = (1000/wavelengths)[order]
+        self.densities = (np.asarray(densities, dtype=np.float64)*(wavelengths/1000)**2)[order]
+
+    def spectral_density(self, wavenumbers, width):
+        if width == 0:
+            return np.interp(wavenumbers, self.wavenumbers, self.densities, left=0, right=0)
+
+        # Convolution with the gaussian on a grid finer than the width and than the table, made of the wavenumbers and
+        # of "steps" points between two of them. Convolving the density sampled at the wavenumbers instead would not be
+        # the convolution of the continuous spectrum.
+        steps = ceil(8*(wavenumbers[1] - wavenumbers[0])/min(width, np.diff(self.wavenumbers).min()))
+        spacing = (wavenumbers[1] - wavenumbers[0])/steps
+        first, last = np.searchsorted(wavenumbers, [self.wavenumbers[0] - 8*width, self.wavenumbers[-1] + 8*width])
+        fine = wavenumbers[first] + np.arange((last - first - 1)*steps + 1)*spacing
+        offsets = np.arange(-ceil(8*width/spacing), ceil(8*width/spacing) + 1)*spacing
+        kernel = np.exp(-0.5*(offsets/width)**2)
+        convolved = np.convolve(np.interp(fine, self.wavenumbers, self.densities, left=0, right=0),
+                                kernel/kernel.sum(), mode="same")
+
+        density = np.zeros_like(wavenumbers)
+        density[first:last] = convolved[::steps]
+        return density
+
+    def max_wavenumber(self):
+        return self.wavenumbers[-1]
+
+
+# The sources of the interface, in the order of their radio buttons. Each source also needs its entries in the
+# sliders and axes limits of config.py.
+registry = {
+        "HeNe": AnalyticSource("Source HeNe", generate_data.generateHeNeSignal),
+        "WhiteLight": AnalyticSource("Source de lumière blanche", generate_data.generateWhiteLightSignal),
+        "Sodium": LineSource("Lampe au sodium", [
+                (588.995, 1.0, 0.002),
+                (589.592, 0.5, 0.002)
+            ]),
+        "Mercury": LineSource("Lampe au mercure", [
+                (404.656, 0.8, 0.002),
+                (435.833, 1.0, 0.002),
+                (546.074, 0.9, 0.002),
+                (576.960, 0.3, 0.002),
+                (579.066, 0.3, 0.002)
+            ]),
+        # Typical spectrum of a blue LED
+        "BlueLED": TabulatedSource("DEL bleue",
+                [420, 430, 435, 440, 445, 450, 455, 460, 465, 470, 480, 490, 500],
+                [0.0, 0.05, 0.15, 0.38, 0.75, 1.0, 0.85, 0.55, 0.3, 0.16, 0.05, 0.02, 0.0])
+    }
@@ -0,0 +1,218 @@
+""" Runs the interferogram computation of the interface over a grid of (source, Pas, Plage, SNR, seed) values taken
+from the slider ranges of config.sources_sliders, without the interface, and saves the spectral resolution metrics
+of each run.
+
+    python sweep.py results/ [--sources HeNe WhiteLight] [--pas-values 10] [--plage-values 10] [--snr-values 4]
+                             [--seeds 3] [--chunk-size 200] [--workers N]
+
+The runs are spread over a pool of processes and saved in compressed chunks "runs-XXXXX.npz" of the output directory
+as soon as they finish. Each chunk holds one column per parameter and per metric, indexed by the "run" column. A sweep
+that was interrupted is resumed by running the same command again: the runs already saved are skipped.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+
+import config as cfg
+from compute_fft import fourierTransformRealInterferogram
+from pipeline import InterferogramPipeline
+
+
+parameters = ["source", "Pas", "Plage", "SNR", "seed"]
+metrics = ["peak_frequency", "peak_wavelength", "fwhm", "noise_floor"]
+
+
+def slider_values(slider, count=None, log=False):
+    """ Values a slider of the interface can take, reduced to "count" values evenly spread over its range. """
+    values = np.arange(slider["minimum"], slider["maximum"]+1, slider["step"])
+    if count is not None and len(values) > count:
+        values = values[np.linspace(0, len(values)-1, count).round().astype(int)]
+    values = values/slider["scale"]
+
+    if log:
+        # Same conversion as the SNR slider of the interface
+        return [int(slider["base"]**value) for value in values]
+    return [float(value) for value in values]
+
+
+def build_grid(source_names, pas_values, plage_values, snr_values, seeds):
+    """ Every run of the sweep as (source, Pas, Plage, SNR, seed). The run id is the position in this list. The runs
+    sharing a signal follow each other so a worker can reuse it.
+    """
+    grid = []
+    for source in source_names:
+        sliders = cfg.sources_sliders[source]
+        for plage in slider_values(sliders["Plage"], plage_values):
+            for pas in slider_values(sliders["Pas"], pas_values):
+                for snr in slider_values(sliders["SNR"], snr_values, log=True):
+                    for seed in range(seeds):
+                        grid.append((source, pas, plage, snr, seed))
+    return grid
+
+
+@lru_cache(maxsize=1)
+def process_pipeline():
+    """ Pipeline of the process, its signal stage is reused by the consecutive runs sharing a signal. """
+    return InterferogramPipeline(max_entries=2)
+
+
+def line_spectrum(request):
+    """
+    Spectrum of the interface for a request of the pipeline, without its constant part: the noisy interferogram of
+    the pipeline stages, minus its mean, transformed with the apodization window of the request. The constant part
+    of the interferogram is a peak at f=0 whose side lobes, for the rectangular window, stay above the spectrum of a
+    broad source such as WhiteLight far from f=0. The spectrum only differs from the displayed one by that peak and its
+    side lobes.
+    """
+    pipeline = process_pipeline()
+    y = pipeline.noisy_signal(request)
+    w, f, s, df = fourierTransformRealInterferogram(pipeline.signal(request)[0], y - y.mean(),
+                                                    window=request["window"])
+    return f, abs(s), df
+
+
+def spectrum_metrics(frequencies, amplitudes):
+    """
+    Resolution metrics of a one-sided amplitude spectrum:
+
+        peak_frequency    frequency (µm^-1) of the highest value, the DC value excluded
+        peak_wavelength   wavelength (nm) of the peak
+        fwhm              full width at half maximum of the peak (µm^-1), interpolated between the spectrum points
+        noise_floor       median amplitude further than 5 widths from the peak, relative to the peak amplitude
+    """
+    peak = np.argmax(amplitudes[1:]) + 1
+    half = amplitudes[peak]/2
+
+    below = np.flatnonzero(amplitudes[:peak] < half)
+    if len(below):
+        i = below[-1]
+        left = np.interp(half, amplitudes[i:i+2], frequencies[i:i+2])
+    else:
+        left = frequencies[0]
+
+    above = np.flatnonzero(amplitudes[peak:] < half)
+    if len(above):
+        i = peak + above[0]
+        # np.interp needs increasing values, the amplitudes decrease after the peak
+        right = np.interp(half, amplitudes[i:i-2:-1], frequencies[i:i-2:-1])
+    else:
+        right = frequencies[-1]
+
+    fwhm = right - left
+    far = abs(frequencies - frequencies[peak]) > 5*fwhm
+    noise_floor = np.median(amplitudes[far])/amplitudes[peak] if far.any() else np.nan
+
+    return frequencies[peak], 1000/frequencies[peak], fwhm, noise_floor
+
+
+def run_chunk(runs):
+    """ Computes the metrics of a list of (run id, parameters) and returns them as columns. """
+    columns = {name: [] for name in ["run"] + parameters + metrics}
+
+    for run, (source, pas, plage, snr, seed) in runs:
+        f, amplitudes, df = line_spectrum({"source": source, "Pas": pas, "Plage": plage, "SNR": snr, "seed": seed,
+                                           "window": next(iter(cfg.apodization_windows))})
+
+        columns["run"].append(run)
+        for name, value in zip(parameters, (source, pas, plage, snr, seed)):
+            columns[name].append(value)
+        for name, value in zip(metrics, spectrum_metrics(f, amplitudes)):
+            columns[name].append(value)
+
+    return {name: np.array(values) for name, values in columns.items()}
+
+
+def saved_runs(directory):
+    """ Ids of the runs already saved in the chunks of the directory. """
+    runs = [np.zeros(0, dtype=int)]
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("runs-") and name.endswith(".npz"):
+            with np.load(os.path.join(directory, name)) as chunk:
+                runs.append(chunk["run"])
+    return set(np.concatenate(runs).tolist())
+
+
+def save_chunk(directory, columns):
+    """ Saves the columns in the next free chunk name. The file is renamed once complete, so an interrupted sweep
+    never leaves a partial chunk behind.
+    """
+    number = sum(name.startswith("runs-") for name in os.listdir(directory))
+    while os.path.exists(os.path.join(directory, "runs-{:05d}.npz".format(number))):
+        number += 1
+
+    path = os.path.join(directory, "runs-{:05d}.npz".format(number))
+    with open(path + ".part", "wb") as file:
+        np.savez_compressed(file, **columns)
+    os.replace(path + ".part", path)
+
+
+def load_results(directory):
+    """ Concatenates the columns of every chunk of a sweep directory, sorted by run id. """
+    chunks = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("runs-") and name.endswith(".npz"):
+            with np.load(os.path.join(directory, name)) as chunk:
+                chunks.append(dict(chunk))
+
+    columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    order = np.argsort(columns["run"])
+    return {name: values[order] for name, values in columns.items()}
+
+
+def sweep(directory, grid, chunk_size=200, workers=None):
+    os.makedirs(directory, exist_ok=True)
+
+    done = saved_runs(directory)
+    todo = [(run, values) for run, values in enumerate(grid) if run not in done]
+    print("{} runs, {} already saved, {} to compute".format(len(grid), len(grid)-len(todo), len(todo)))
+
+    start = time.perf_counter()
+    computed = 0
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(run_chunk, todo[i:i+chunk_size]) for i in range(0, len(todo), chunk_size)]
+        for future in as_completed(futures):
+            columns = future.result()
+            save_chunk(directory, columns)
+
+            computed += len(columns["run"])
+            elapsed = time.perf_counter() - start
+            print("{:7d}/{} runs  {:8.1f} runs/s".format(computed, len(todo), computed/elapsed), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory of the saved chunks")
+    parser.add_argument("--sources", nargs="+", default=list(cfg.sources_sliders), metavar="SOURCE",
+                        help="among {}".format(", ".join(cfg.sources_sliders)))
+    parser.add_argument("--pas-values", type=int, default=10, help="number of Pas values per source")
+    parser.add_argument("--plage-values", type=int, default=10, help="number of Plage values per source")
+    parser.add_argument("--snr-values", type=int, default=4, help="number of SNR values per source")
+    parser.add_argument("--seeds", type=int, default=3, help="number of noise realizations per parameters")
+    parser.add_argument("--chunk-size", type=int, default=200, help="number of runs per saved chunk")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    unknown = set(args.sources) - set(cfg.sources_sliders)
+    if unknown:
+        parser.error("unknown sources: {}".format(", ".join(sorted(unknown))))
+
+    # The run ids are positions in the grid, resuming with another grid would mix runs
+    grid_arguments = {name: getattr(args, name) for name in
+                      ["sources", "pas_values", "plage_values", "snr_values", "seeds"]}
+    grid_path = os.path.join(args.directory, "grid.json")
+    if os.path.exists(grid_path):
+        with open(grid_path) as file:
+            if json.load(file) != grid_arguments:
+                parser.error("{} holds a sweep over another grid".format(args.directory))
+    else:
+        os.makedirs(args.directory, exist_ok=True)
+        with open(grid_path, "w") as file:
+            json.dump(grid_arguments, file, indent=4)
+
+    grid = build_grid(args.sources, args.pas_values, args.plage_values, args.snr_values, args.seeds)
+    sweep(args.directory, grid, args.chunk_size, args.workers)
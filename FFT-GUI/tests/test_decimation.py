@@ -0,0 +1,25 @@
+""" Decimation of the lines of the figures (decimation.py).
+
+    python -m pytest tests
+"""
+import numpy as np
+
+from decimation import bandDecimate, minMaxDecimate
+
+
+def test_minmax_ignores_nan():
+    x = np.linspace(0, 10, 10001)
+    y = np.sin(5*x)
+    y[500] = np.nan
+    y[2000:2100] = np.nan  # A whole column of pixels
+
+    xd, yd = minMaxDecimate(x, y, (0, 10), 100)
+    assert np.all(np.diff(xd) >= 0)
+    assert np.nanmax(yd) == np.nanmax(y) and np.nanmin(yd) == np.nanmin(y)
+
+
+def test_band_floors_columns():
+    # Points just left of the axis belong to the column left of the first pixel, not to the first pixel
+    x = np.linspace(-0.001, 10, 10002)
+    xd, low, high = bandDecimate(x, -np.ones_like(x), np.ones_like(x), (0, 10), 100)
+    assert xd[0] == x[0] and xd[1] == x[1]
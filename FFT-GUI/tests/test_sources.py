@@ -0,0 +1,42 @@
+""" Interferograms of the sources defined by their spectrum (generate_data.synthesizeInterferogram) against the direct
+sum of the cosines of their spectrum, at the smallest Pas and largest Plage of their sliders, where the synthesis is
+the most demanding.
+
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+import config as cfg
+import sources
+
+
+def spectrum_sources():
+    for name, source in sources.registry.items():
+        if isinstance(source, sources.SpectrumSource):
+            sliders = cfg.sources_sliders[name]
+            yield pytest.param(source, sliders["Pas"]["minimum"]/sliders["Pas"]["scale"],
+                               sliders["Plage"]["maximum"]/sliders["Plage"]["scale"], id=name)
+
+
+def direct_sum(source, x, chunk=1000):
+    """ Sum of the cosines of the spectrum at the positions x, normalized to 1 at zero path difference. """
+    if isinstance(source, sources.LineSource):
+        # The interferogram of a gaussian line of standard deviation s is exp(-2π²s²x²)cos(2πσx)
+        y = np.zeros_like(x)
+        for wavelength, intensity, fwhm in source.lines:
+            std = fwhm/1000/(wavelength/1000)**2/(2*np.sqrt(2*np.log(2)))
+            y += intensity*np.exp(-2*np.pi**2*std**2*x**2)*np.cos(2*np.pi*1000/wavelength*x)
+        return y/sum(intensity for wavelength, intensity, fwhm in source.lines)
+
+    wavenumbers = np.linspace(0, source.max_wavenumber(), 20001)
+    density = source.spectral_density(wavenumbers, 0)
+    y = np.concatenate([np.cos(2*np.pi*np.outer(x[start:start+chunk], wavenumbers)) @ density
+                        for start in range(0, len(x), chunk)])
+    return y/density.sum()
+
+
+@pytest.mark.parametrize("source, pas, plage", list(spectrum_sources()))
+def test_synthesis_matches_direct_sum(source, pas, plage):
+    x, y = source.generate(0, plage, pas)
+    assert np.abs(y - direct_sum(source, x)).max() < 1e-3
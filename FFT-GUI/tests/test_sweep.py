@@ -0,0 +1,50 @@
+""" Metrics of the sweep (sweep.py): the peak of the spectrum of each source lies on the lines it emits, or on their
+aliases when Pas is too large, over a grid of the Pas and Plage sliders.
+
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+import config as cfg
+import sweep
+
+
+# Wavenumbers (µm^-1) emitted by each source, as (lowest, highest) bands
+emitted = {
+        "HeNe": [(1/0.6328, 1/0.6328)],
+        "WhiteLight": [(1/0.8, 1/0.4)],
+        "Sodium": [(1000/589.592, 1000/588.995)],
+        "Mercury": [(1000/576.960, 1000/576.960), (1000/579.066, 1000/579.066), (1000/546.074, 1000/546.074),
+                    (1000/435.833, 1000/435.833), (1000/404.656, 1000/404.656)],
+        "BlueLED": [(1000/490, 1000/425)]
+    }
+
+
+def grid():
+    for source in cfg.sources_sliders:
+        # The highest SNR of the slider, the peak of a noisier spectrum may be a noise spike
+        snr = sweep.slider_values(cfg.sources_sliders[source]["SNR"], log=True)[-1]
+        for grid_source, pas, plage, lowest_snr, seed in sweep.build_grid([source], 4, 3, 1, 1):
+            yield pytest.param(source, pas, plage, snr, id="{}-Pas_{}-Plage_{}".format(source, pas, plage))
+
+
+def folded(wavenumber, nyquist):
+    """ Wavenumber at which the sampling shows a wavenumber, between 0 and the Nyquist frequency. """
+    return abs((wavenumber + nyquist) % (2*nyquist) - nyquist)
+
+
+@pytest.mark.parametrize("source, pas, plage, snr", list(grid()))
+def test_peak_on_emitted_line(source, pas, plage, snr):
+    f, amplitudes, df = sweep.line_spectrum({"source": source, "Pas": pas, "Plage": plage, "SNR": snr, "seed": 0,
+                                             "window": next(iter(cfg.apodization_windows))})
+    peak = sweep.spectrum_metrics(f, amplitudes)[0]
+
+    # The resolution of the spectrum is 1/Plage, the peak of a line lies within it
+    nyquist = 1/2/pas
+    tolerance = 2/plage
+    for low, high in emitted[source]:
+        band = np.linspace(low, high, 1000)
+        if np.min(abs(folded(band, nyquist) - peak)) <= tolerance:
+            return
+    pytest.fail("peak at {:.4f} µm^-1, far from the lines of {}".format(peak, source))
@@ -0,0 +1,271 @@
+import matplotlib
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+import numpy
+
+import sys
+sys.path.append("../")
+from decimation import minMaxDecimate, bandDecimate
+from zoom_index import ZoomIndex
+
+
+teal = "#008080"
+zoomed_color = "#1a1a1a"
+
+
+def set_decimated_data(line, ax, index):
+    """ Sets the data of a line reduced to the points visible in its axes, at
+    most two per horizontal pixel (see decimation.minMaxDecimate). The visible
+    points are found with the ZoomIndex of the data.
+    """
+    visible = index.window(ax.get_xlim(), margin=1)
+    line.set_data(minMaxDecimate(index.x[visible], index.y[visible], ax.get_xlim(), ax.bbox.width))
+
+def set_decimated_band(band, ax, low_index, high_index):
+    """ Sets the polygon of a band between two curves sharing the same x axis,
+    reduced to the part visible in its axes (see decimation.bandDecimate).
+    """
+    visible = low_index.window(ax.get_xlim(), margin=1)
+    x, low, high = bandDecimate(low_index.x[visible], low_index.y[visible], high_index.y[visible],
+            ax.get_xlim(), ax.bbox.width)
+    if len(x) == 0:
+        band.set_verts([])
+        return
+
+    vertices = numpy.empty((2*len(x), 2))
+    vertices[:len(x), 0] = x
+    vertices[:len(x), 1] = low
+    vertices[len(x):, 0] = x[::-1]
+    vertices[len(x):, 1] = high[::-1]
+    band.set_verts([vertices])
+
+def stable_limits(current_limits, data_limits, margin=0.1, shrink_ratio=0.6):
+    """ Returns limits containing data_limits that only change when the data
+    leaves the current limits or uses less than shrink_ratio of their span.
+    New limits are padded by margin (fraction of the span) so that small
+    fluctuations of the data do not change the limits on every frame.
+    """
+    current_min, current_max = current_limits
+    data_min, data_max = data_limits
+    current_span = current_max - current_min
+    data_span = data_max - data_min
+
+    if current_min <= data_min and data_max <= current_max and data_span >= shrink_ratio*current_span:
+        return current_limits
+
+    return data_min - margin*data_span, data_max + margin*data_span
+
+def zoomed_axes(fig):
+    """ Adds the main axes, two thirds of the figure wide, and the zoomed axes
+    on their right, framed with the color of the zoom rectangle.
+    """
+    grid = fig.add_gridspec(1, 3)
+    ax = fig.add_subplot(grid[0, :2])
+    zoomed_ax = fig.add_subplot(grid[0, 2])
+
+    for child in zoomed_ax.get_children():
+        if isinstance(child, matplotlib.spines.Spine):
+            child.set_color(zoomed_color)
+            child.set_linewidth(1.5)
+    return ax, zoomed_ax
+
+class InterferogramPlot:
+    """ Figure of the interferogram of a session, with a zoomed view, without
+    any canvas: the classes using it as a mixin attach the figure to a canvas
+    and provide "blit_mode", "redraw()", which draws the figure on the canvas,
+    and "limits_changed()" (see figures.InterferogramDynamicCanvas for the
+    interface and render.py for offscreen rendering).
+    """
+    def __init__(self, session, blit=False, **kwargs):
+        self.session = session
+        self.data_version = None
+        self.blit_mode = blit
+
+        self.fig = Figure(**kwargs)
+        self.ax, self.zoomed_ax = zoomed_axes(self.fig)
+
+        self.ax.set_xlabel("Position du miroir [µm]")
+        self.ax.set_ylabel("Voltage normalisé [-]")
+        self.zoomed_ax.set_xlabel("Position du miroir [µm]")
+
+        self.rectangle = Rectangle((0,0), width=1, height=2,
+                alpha=1, fill=False, ec=zoomed_color, lw=2, ls='--', zorder=4)
+        self.ax.add_patch(self.rectangle)
+
+        self.line = Line2D([], [], color=teal, ls='-')
+        self.ax.add_line(self.line)
+        self.line_copy = Line2D([], [], color=teal, ls='-', markersize=3, marker='o')
+        self.zoomed_ax.add_line(self.line_copy)
+
+        self.ax.set_ylim(-1, 1)
+        self.zoomed_ax.set_ylim(-1, 1)
+
+        self.data_index = ZoomIndex([], [])
+        self.animated_artists = [self.line, self.line_copy, self.rectangle]
+
+    def finish_layout(self):
+        self.fig.suptitle("Interférogramme")
+        self.fig.tight_layout()
+        self.fig.subplots_adjust(top=0.85, bottom=0.25)
+
+    def update_data(self):
+        self.data_version = self.session.interferogram_version
+        self.data_index = ZoomIndex(*self.session.interferogram)
+
+        zoom_ymin, zoom_ymax = self.data_index.y_range(self.zoomed_ax.get_xlim(), default=(-1, 1))
+
+        if self.blit_mode:
+            zoom_ymin, zoom_ymax = stable_limits(self.zoomed_ax.get_ylim(), (zoom_ymin, zoom_ymax))
+        self.zoomed_ax.set_ylim(zoom_ymin, zoom_ymax)
+        self.rectangle.set_xy((self.rectangle.get_xy()[0], zoom_ymin))
+        self.rectangle.set_height(zoom_ymax-zoom_ymin)
+
+    def draw_frame(self):
+        if self.session.blocked:
+            return
+
+        if self.data_version != self.session.interferogram_version:
+            self.update_data()
+        elif not self.limits_changed():
+            return
+
+        self.update_lines()
+        self.redraw()
+
+    def update_lines(self):
+        set_decimated_data(self.line, self.ax, self.data_index)
+        set_decimated_data(self.line_copy, self.zoomed_ax, self.data_index)
+
+    def rescale_axis(self, limits, zoomed_limits):
+        self.rectangle.set_xy((zoomed_limits[0], self.rectangle.get_xy()[1]))
+        self.rectangle.set_width(zoomed_limits[1]-zoomed_limits[0])
+        self.ax.set_xlim(*limits)
+        self.zoomed_ax.set_xlim(*zoomed_limits)
+
+class FFTPlot:
+    """ Figure of the spectrum of a session, with a zoomed view and the
+    optional band of the noise realizations. Like InterferogramPlot, it is a
+    mixin of the classes providing the canvas.
+    """
+    def __init__(self, session, blit=False, **kwargs):
+        self.xaxis_type = "wavelengths"
+        self.session = session
+        self.data_version = None
+        self.blit_mode = blit
+
+        self.fig = Figure(**kwargs)
+        self.ax, self.zoomed_ax = zoomed_axes(self.fig)
+        self.zoomed_ax.set_yticklabels([])
+
+        self.ax.set_xlabel("Longueur d'onde [nm]")
+        self.zoomed_ax.set_xlabel("Longueur d'onde [nm]")
+        self.ax.set_ylabel("Intensité")
+
+        self.rectangle = Rectangle((0,0), width=1, height=1,
+                alpha=1, fill=False, ec=zoomed_color, lw=2, ls='--', zorder=4)
+        self.ax.add_patch(self.rectangle)
+
+        self.line = Line2D([], [], color=teal, ls='-')
+        self.ax.add_line(self.line)
+        self.line_copy = Line2D([], [], color=teal, ls='-', markersize=3, marker='o')
+        self.zoomed_ax.add_line(self.line_copy)
+
+        # Percentile band of the noise realizations, empty with a single realization
+        self.band = PolyCollection([], facecolor=teal, edgecolor="none", alpha=0.3)
+        self.ax.add_collection(self.band)
+        self.band_copy = PolyCollection([], facecolor=teal, edgecolor="none", alpha=0.3)
+        self.zoomed_ax.add_collection(self.band_copy)
+
+        self.ax.set_ylim(0, 1)
+        self.zoomed_ax.set_ylim(0, 1)
+
+        self.data_index = ZoomIndex([], [])
+        self.band_indices = None
+        self.animated_artists = [self.band, self.band_copy, self.line, self.line_copy, self.rectangle]
+
+    def finish_layout(self):
+        self.fig.suptitle("Transformée de Fourier")
+        self.fig.tight_layout()
+        self.fig.subplots_adjust(top=0.85, bottom=0.25)
+
+    def update_data(self):
+        """ Indexes the spectrum of the session, against the current x axis
+        type, and its optional (low, high) band drawn as a shaded area.
+        """
+        self.data_version = self.session.spectrum_version
+        self.data_index = ZoomIndex(*self.session.spectrum)
+
+        band = self.session.band
+        if band is None:
+            self.band_indices = None
+        else:
+            x = self.session.spectrum[0]
+            self.band_indices = (ZoomIndex(x, band[0]), ZoomIndex(x, band[1]))
+
+    def toggle_xaxis_type(self):
+        if self.xaxis_type == "wavelengths":
+            self.xaxis_type = "frequencies"
+            self.ax.set_xlabel("Fréquences [µm$^{-1}$]")
+            self.zoomed_ax.set_xlabel("Fréquences [µm$^{-1}$]")
+
+        elif self.xaxis_type == "frequencies":
+            self.xaxis_type = "wavelengths"
+            self.ax.set_xlabel("Longueurs d'onde [nm]")
+            self.zoomed_ax.set_xlabel("Longueurs d'onde [nm]")
+
+    def draw_frame(self):
+        if self.session.blocked:
+            return
+
+        if self.data_version != self.session.spectrum_version:
+            self.update_data()
+        elif not self.limits_changed():
+            return
+
+        self.update_lines()
+
+        max_intensity = self.intensity_range()[1]*1.05
+        if self.blit_mode:
+            max_intensity = stable_limits(self.ax.get_ylim(), (0, max_intensity))[1]
+        self.ax.set_ylim(0, max_intensity)
+
+        zoom_ymin, zoom_ymax = self.intensity_range(self.zoomed_ax.get_xlim())
+
+        if self.blit_mode:
+            zoom_ymin, zoom_ymax = stable_limits(self.zoomed_ax.get_ylim(), (zoom_ymin, zoom_ymax))
+        self.zoomed_ax.set_ylim(zoom_ymin, zoom_ymax)
+        self.rectangle.set_xy((self.rectangle.get_xy()[0], zoom_ymin))
+        self.rectangle.set_height(zoom_ymax-zoom_ymin)
+
+        self.redraw()
+
+    def update_lines(self):
+        set_decimated_data(self.line, self.ax, self.data_index)
+        set_decimated_data(self.line_copy, self.zoomed_ax, self.data_index)
+
+        if self.band_indices is None:
+            self.band.set_verts([])
+            self.band_copy.set_verts([])
+        else:
+            set_decimated_band(self.band, self.ax, *self.band_indices)
+            set_decimated_band(self.band_copy, self.zoomed_ax, *self.band_indices)
+
+    def intensity_range(self, xlim=None):
+        """ Minimum and maximum of the spectrum, or of its band when there is
+        one, over the whole spectrum or in the window xlim. A window without
+        points gives the range of the whole spectrum.
+        """
+        indices = [self.data_index] if self.band_indices is None else self.band_indices
+
+        ranges = [index.finite_range() for index in indices]
+        if xlim is not None:
+            ranges = [index.y_range(xlim, default=default) for index, default in zip(indices, ranges)]
+        return min(low for low, high in ranges), max(high for low, high in ranges)
+
+    def rescale_axis(self, limits, zoomed_limits):
+        self.rectangle.set_xy((zoomed_limits[0], self.rectangle.get_xy()[1]))
+        self.rectangle.set_width(zoomed_limits[1]-zoomed_limits[0])
+        self.ax.set_xlim(*limits)
+        self.zoomed_ax.set_xlim(*zoomed_limits)
@@ -0,0 +1,64 @@
+import numpy as np
+
+""" Recherche de la fenêtre de zoom dans des données dont l'axe x est
+monotone, comme les positions du miroir et les axes du spectre.
+"""
+
+
+class ZoomIndex:
+    """ Index des données (x, y) dont l'axe x est croissant ou décroissant.
+    Les bornes d'une fenêtre [xMin, xMax] sont trouvées par recherche binaire
+    (np.searchsorted) en O(log N), sans masque booléen de la taille des données.
+    Les valeurs non finies de x sont tolérées seulement aux extrémités (comme
+    la longueur d'onde NaN de la valeur DC) et sont ignorées.
+
+    L'étendue des valeurs finies de y est calculée une seule fois par jeu de
+    données.
+    """
+
+    def __init__(self, x, y):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+
+        start, stop = 0, len(self.x)
+        while start < stop and not np.isfinite(self.x[start]):
+            start += 1
+        while stop > start and not np.isfinite(self.x[stop-1]):
+            stop -= 1
+        self._start, self._stop = start, stop
+
+        finite_x = self.x[start:stop]
+        self.descending = len(finite_x) > 1 and finite_x[-1] < finite_x[0]
+        self._ascending_x = finite_x[::-1] if self.descending else finite_x
+        self._finite_range = None
+
+    def window(self, xlim, margin=0):
+        """ Retourne la tranche des données dont x est entre xlim[0] et xlim[1],
+        élargie de margin points de chaque côté.
+        """
+        low = np.searchsorted(self._ascending_x, xlim[0], side="left")
+        high = np.searchsorted(self._ascending_x, xlim[1], side="right")
+        if self.descending:
+            low, high = len(self._ascending_x) - high, len(self._ascending_x) - low
+
+        low = max(low - margin, 0) + self._start
+        high = min(high + margin, len(self._ascending_x)) + self._start
+        return slice(low, max(low, high))
+
+    def y_range(self, xlim, default=None):
+        """ Minimum et maximum de y dans la fenêtre xlim, ou default si aucun
+        point n'est dans la fenêtre.
+        """
+        values = self.y[self.window(xlim)]
+        if len(values) == 0:
+            return default
+        return values.min(), values.max()
+
+    def finite_range(self):
+        """ Minimum et maximum des valeurs finies de y. """
+        if self._finite_range is None:
+            values = self.y[self._start:self._stop]
+            if not np.all(np.isfinite(values)):
+                values = values[np.isfinite(values)]
+            self._finite_range = (values.min(), values.max()) if len(values) else (0, 1)
+        return self._finite_range
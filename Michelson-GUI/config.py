@@ -6,4 +6,15 @@ voltmeter_usb_port = None
 motor_steps = { "default": 10, "min": 10, "max": 20 }  # µm
 step_delay = { "default": 10, "min": 10, "max": 100 }  # ms
 
+# "Optimiser le moyennage": each point is measured until the standard error of
+# its mean voltage is below "standard error", with between "minimum" and
+# "maximum" measures
+adaptive_averaging = { "standard error": 0.005, "minimum": 4, "maximum": 200 }
+
+# "Balayage continu": the motor moves at a constant velocity while the voltmeter
+# is read continuously, and the motor position is read every "position interval"
+fly_scan = { "position interval": 20 }  # ms
+
+acquisition_display_interval = 50  # ms between two displays of the acquired data
+
 calibration_factor = 10
@@ -0,0 +1,204 @@
+import heapq
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+import apt
+from motor import Motor, jog_settings
+
+
+class FakeCube:
+    """
+    ThorLabs cube simulated behind a pseudo-terminal, to use Motor without a stage (Linux and macOS only):
+
+        cube = FakeCube()
+        motor = Motor(cube.port, "ZST225B")
+
+    The cube answers the APT messages used by Motor. Each reply is sent "latency" seconds after its command; a jog or
+    a move is completed after "move_time" seconds, or after the time of the travel at the velocity and acceleration of
+    its parameters when "move_time" is None. Homing lasts "home_time" seconds. MGMSG_MOT_MOVE_STOP cancels the jog or
+    move in progress, which then leaves the position where it was. During a move at constant velocity
+    (MGMSG_MOT_MOVE_VELOCITY), the position counter advances with time. After MGMSG_HW_START_UPDATEMSGS, the cube sends
+    a status update every "status_interval" seconds.
+
+    The replies are sent in the order of their time by a single thread, like the cube handles its messages in order.
+    """
+
+    def __init__(self, motor_name="ZST225B", latency=0.002, move_time=None, home_time=0.1, status_interval=0.1):
+        self.latency = latency
+        self.move_time = move_time
+        self.home_time = home_time
+        self.status_interval = status_interval
+        self._unit_conversions = Motor.unit_conversion[motor_name]
+
+        self.address = 0x50
+        self.enabled = False
+        self.position = 0  # MU
+        # Until Motor sets them, the parameters of the moves are those of the jogs
+        conversions = self._unit_conversions
+        self.velocity_parameters = (1, int(conversions["MU/(mm/s)"]*jog_settings["min velocity"]),
+                                    int(conversions["MU/(mm/s^2)"]*jog_settings["acceleration"]),
+                                    int(conversions["MU/(mm/s)"]*jog_settings["max velocity"]))
+        self.jog_parameters = (1, jog_settings["jog mode"], 0, *self.velocity_parameters[1:], jog_settings["stop mode"])
+        self._velocity_move = None  # (start time, start position, MU/s)
+        self._move_number = 0  # Number of the last move, a stopped move is not completed
+        self._status_updates = False
+        self._next_status = None
+
+        self._replies = []  # Heap of (time, order, function returning the reply)
+        self._order = 0
+        self._buffer = b""
+
+        self._master, slave = pty.openpty()
+        tty.setraw(slave)
+        self._slave = slave
+        self.port = os.ttyname(slave)
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+
+    def close(self):
+        self._is_running = False
+        self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+
+    def inject(self, data):
+        """ Writes raw bytes to the port, such as bytes that are not a message, to test the framing of the reader. """
+        os.write(self._master, data)
+
+
+    def get_position(self, timestamp=None):
+        """ Position counter in MU at the time.perf_counter() timestamp, now by default. """
+        if self._velocity_move is None:
+            return self.position
+        start, position, velocity = self._velocity_move
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        return int(round(position + velocity*(timestamp - start)))
+
+
+    def _serve(self):
+        while self._is_running:
+            now = time.perf_counter()
+            while self._replies and self._replies[0][0] <= now:
+                reply = heapq.heappop(self._replies)[2]()
+                if reply:
+                    os.write(self._master, reply)
+
+            if self._status_updates and now >= self._next_status:
+                os.write(self._master, self._status(apt.MOT_GET_DCSTATUSUPDATE))
+                self._next_status = now + self.status_interval
+
+            deadlines = [0.05]
+            if self._replies:
+                deadlines.append(self._replies[0][0] - now)
+            if self._status_updates:
+                deadlines.append(self._next_status - now)
+            readable, _, _ = select.select([self._master], [], [], max(min(deadlines), 0))
+            if readable:
+                self._buffer += os.read(self._master, 1024)
+                self._handle_messages()
+
+
+    def _handle_messages(self):
+        while len(self._buffer) >= 6:
+            message_id, parameter_1, parameter_2, destination, source = apt.decode_header(self._buffer)
+            length = 6 + (parameter_1 | parameter_2 << 8 if destination & 0x80 else 0)
+            if len(self._buffer) < length:
+                return
+            data = self._buffer[6:length]
+            self._buffer = self._buffer[length:]
+            self._handle(message_id, parameter_1, parameter_2, data, source)
+
+
+    def _handle(self, message_id, parameter_1, parameter_2, data, host):
+        now = time.perf_counter()
+        reply = lambda message, *values: lambda: message.encode(host, self.address, *values)
+
+        if message_id == apt.HW_REQ_INFO.id:
+            self._send(now, reply(apt.HW_GET_INFO, 0, b"ZST225B", 16, b"", b"Fake cube", b"", 1, 0, 1))
+        elif message_id == apt.HW_START_UPDATEMSGS.id:
+            self._status_updates = True
+            self._next_status = now
+        elif message_id == apt.MOD_SET_CHANENABLESTATE.id:
+            self.enabled = parameter_2 == 0x01
+        elif message_id == apt.MOD_REQ_CHANENABLESTATE.id:
+            self._send(now, lambda: apt.MOD_GET_CHANENABLESTATE.encode(host, self.address, parameter_1,
+                                                                       0x01 if self.enabled else 0x02))
+        elif message_id == apt.MOT_REQ_POSCOUNTER.id:
+            # The position is the one at the time of the request
+            position = self.get_position(now)
+            self._send(now, reply(apt.MOT_GET_POSCOUNTER, parameter_1, position))
+        elif message_id == apt.MOT_SET_VELPARAMS.id:
+            self.velocity_parameters = apt.MOT_SET_VELPARAMS.decode(data)
+        elif message_id == apt.MOT_REQ_VELPARAMS.id:
+            self._send(now, lambda: apt.MOT_GET_VELPARAMS.encode(host, self.address, *self.velocity_parameters))
+        elif message_id == apt.MOT_SET_JOGPARAMS.id:
+            self.jog_parameters = apt.MOT_SET_JOGPARAMS.decode(data)
+        elif message_id == apt.MOT_REQ_JOGPARAMS.id:
+            self._send(now, lambda: apt.MOT_GET_JOGPARAMS.encode(host, self.address, *self.jog_parameters))
+        elif message_id == apt.MOT_MOVE_HOME.id:
+            self._send(now + self.home_time, self._move_to(0, reply(apt.MOT_MOVE_HOMED, parameter_1)))
+        elif message_id == apt.MOT_MOVE_JOG.id:
+            channel, mode, step, min_velocity, acceleration, max_velocity, stop_mode = self.jog_parameters
+            step = step if parameter_2 == 0x01 else -step
+            self._move(now, host, self.position + step, max_velocity, acceleration)
+        elif message_id in (apt.MOT_MOVE_RELATIVE.id, apt.MOT_MOVE_ABSOLUTE.id):
+            channel, position = apt.messages[message_id].decode(data)
+            if message_id == apt.MOT_MOVE_RELATIVE.id:
+                position += self.position
+            channel, min_velocity, acceleration, max_velocity = self.velocity_parameters
+            self._move(now, host, position, max_velocity, acceleration)
+        elif message_id == apt.MOT_MOVE_VELOCITY.id:
+            channel, min_velocity, acceleration, max_velocity = self.velocity_parameters
+            direction = 1 if parameter_2 == 0x01 else -1
+            self._velocity_move = (now, self.get_position(now), direction*self._MU_per_second(max_velocity))
+        elif message_id == apt.MOT_MOVE_STOP.id:
+            self.position = self.get_position(now)
+            self._velocity_move = None
+            self._move_number += 1
+            self._send(now, lambda: self._status(apt.MOT_MOVE_STOPPED, host))
+
+
+    def _move(self, now, host, position, velocity, acceleration):
+        move_time = self.move_time
+        if move_time is None:
+            # Travel at the velocity, plus the time to accelerate and decelerate
+            speed = self._MU_per_second(velocity)
+            move_time = abs(position - self.position)/speed if speed > 0 else 0
+            if acceleration > 0:
+                move_time += (velocity/self._unit_conversions["MU/(mm/s)"])/(acceleration/self._unit_conversions["MU/(mm/s^2)"])
+        self._move_number += 1
+        completed = lambda: self._status(apt.MOT_MOVE_COMPLETED, host)
+        self._send(now + move_time, self._move_to(position, completed, self._move_number))
+
+
+    def _move_to(self, position, reply, move_number=None):
+        """ Function moving to the position and returning the reply, unless the move "move_number" was stopped. """
+        def move():
+            if move_number is not None and move_number != self._move_number:
+                return None
+            self.position = position
+            return reply()
+        return move
+
+
+    def _status(self, message, host=0x01):
+        return message.encode(host, self.address, 1, self.get_position(), 0, 0, 0)
+
+
+    def _send(self, when, reply):
+        """ Sends the reply returned by the function "reply" at "when" plus the latency. """
+        heapq.heappush(self._replies, (when + self.latency, self._order, reply))
+        self._order += 1
+
+
+    def _MU_per_second(self, velocity):
+        """ Position counts per second of a velocity parameter """
+        return velocity/self._unit_conversions["MU/(mm/s)"]*1e3*self._unit_conversions["MU/um"]
@@ -41,6 +41,7 @@ class MainWindow(QtWidgets.QWidget):
 
         data_acquirer = DataAcquirer(self.motor, self.voltmeter, setup_config.get_setup_information, setup_information.get_calibration_factor)
         data_acquirer.add_callback(setup_information.display_position)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(data_acquirer.stop)
         data_acquisition = DataAcquisitionLayout(self.motor, self.voltmeter, data_acquirer, self._toggle_widgets, self._toggle_refresh)
         main_layout.addWidget(LineSeparator())
         self.addLayout(main_layout, data_acquisition)
@@ -1,9 +1,12 @@
-from struct import pack, unpack
+from collections import namedtuple
+import threading
 import time
 from warnings import warn
 
 import serial
 
+import apt
+
 
 # Properties must be integers.
 jog_settings = {
@@ -14,34 +17,226 @@ jog_settings = {
             "stop mode"   : 0x0002   # smooth stop
         }
 
+# The waits for the end of a move are bounded, so a motor that stops answering raises TimeoutError instead of hanging
+# the acquisition and the interface. A move may last "factor" times the time of its travel at the velocity and
+# acceleration of its parameters, plus "margin" seconds. Homing may cross the whole travel of the stage at the max
+# velocity of the jogs.
+move_timeout = {
+            "factor": 2,
+            "margin": 2,   # s
+            "travel": 25   # mm, travel of the ZST225B
+        }
+
 
 class MotorTest:
+    """
+    Motor simulated without hardware. Jogs are instantaneous; "move_at_velocity" moves the motor at the constant
+    velocity of "set_velocity" until "stop", the position then depends on the time at which it is read.
+    """
+
     def __init__(self, *args):
         self.position = 0
         self.step = 0
+        self.velocity = jog_settings["max velocity"]*1e3  # µm/s
         self._reference_point = 0
+        self._move_start = None
+        self._direction = 1
 
 
     def set_step_size(self, size):
         self.step = size
 
 
+    def set_velocity(self, velocity):
+        """ velocity in mm/s, limited to the max velocity of the jogs like the motor. Returns the velocity applied. """
+        self.velocity = min(velocity, jog_settings["max velocity"])*1e3
+        return self.velocity/1e3
+
+
+    def move_at_velocity(self, forward):
+        self.position = self.get_absolute_position()
+        self._direction = 1 if forward else -1
+        self._move_start = time.perf_counter()
+
+
+    def stop(self):
+        self.position = self.get_absolute_position()
+        self._move_start = None
+
+
+    def wait_until_stopped(self):
+        pass
+
+
     def set_reference_point(self):
-        self._reference_point = self.position
+        self._reference_point = self.get_absolute_position()
 
 
     def get_absolute_position(self):
-        return self.position
+        return self.position_at(time.perf_counter())
+
+
+    def position_at(self, timestamp):
+        """ Position at the time.perf_counter() timestamp, during a move at constant velocity. """
+        if self._move_start is None:
+            return self.position
+        return self.position + self._direction*self.velocity*(timestamp - self._move_start)
 
 
     def get_relative_position(self):
-        return self.position - self._reference_point
+        return self.get_absolute_position() - self._reference_point
 
 
     def jog(self, forward):
         self.position += self.step if forward else -self.step
 
 
+# An APT message received from the motor. "parameters" are the two parameter bytes of a header-only message, None
+# for a message with a data packet; "data" is the data packet, empty for a header-only message. "timestamp" is the
+# time.perf_counter() time at which the message was completely read.
+AptMessage = namedtuple("AptMessage", ["id", "parameters", "data", "timestamp"])
+
+
+class AptMessageReader:
+    """
+    Thread reading the messages sent by the motor.
+
+    The thread frames the incoming bytes into APT messages: a 6-byte header, followed by a data packet when the
+    destination byte has its 0x80 bit set, the length of the packet then being the bytes 2 and 3 of the header. A
+    header whose destination is not this computer is not the start of a message: the reader skips one byte and tries
+    again, so it finds the messages again after an unexpected byte.
+
+    Each message is sent to the waiters of its ID, which are called once, and to its subscribers, which are called
+    for every message of this ID from the thread of the reader. "request" writes a command and waits for its reply;
+    the time between both is kept for each command and summarized by "latency_statistics".
+    """
+
+    def __init__(self, communicator, source):
+        self._communicator = communicator
+        self._source = source  # This computer, the destination of the messages of the motor
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._subscribers = {}
+        self._latencies = {}
+        self._buffer = b""
+
+        self._is_reading = True
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+
+    def stop(self):
+        self._is_reading = False
+        self._thread.join()
+
+
+    def expect(self, message_id):
+        """
+        Returns a waiter of the next message "message_id", whose "wait(timeout)" method returns this message. The
+        waiter must be created before writing the command, otherwise a fast reply could arrive before it.
+        """
+        waiter = _MessageWaiter(message_id)
+        with self._lock:
+            self._waiters.setdefault(message_id, []).append(waiter)
+        return waiter
+
+
+    def forget(self, waiter):
+        """ Removes a waiter of "expect" that will not be waited for anymore, such as one that timed out. """
+        with self._lock:
+            waiters = self._waiters.get(waiter.message_id, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+
+    def subscribe(self, message_id, callback):
+        """ Calls "callback" with every message "message_id", from the thread of the reader. """
+        with self._lock:
+            self._subscribers.setdefault(message_id, []).append(callback)
+
+
+    def request(self, command, reply_id, timeout=1):
+        """ Writes the command, waits for the message "reply_id" and returns it. """
+        waiter = self.expect(reply_id)
+        sent = time.perf_counter()
+        self._communicator.write(command)
+        try:
+            reply = waiter.wait(timeout)
+        finally:
+            self.forget(waiter)
+
+        with self._lock:
+            self._latencies.setdefault(apt.message_id(command), []).append(reply.timestamp - sent)
+        return reply
+
+
+    def latency_statistics(self):
+        """ Count, mean, minimum and maximum latency in seconds of each command sent with "request", by command ID. """
+        with self._lock:
+            latencies = {command_id: list(values) for command_id, values in self._latencies.items()}
+
+        return {command_id: {"count": len(values), "mean": sum(values)/len(values), "minimum": min(values),
+                             "maximum": max(values)}
+                for command_id, values in latencies.items()}
+
+
+    def _read(self):
+        while self._is_reading:
+            # Blocks until a byte arrives or the timeout of the port
+            received = self._communicator.read(self._communicator.in_waiting or 1)
+            if received:
+                self._buffer += received
+                self._frame_messages()
+
+
+    def _frame_messages(self):
+        while len(self._buffer) >= 6:
+            message_id, parameter_1, parameter_2, destination, source = apt.decode_header(self._buffer)
+            if destination & 0x7F != self._source:
+                self._buffer = self._buffer[1:]
+                continue
+
+            if destination & 0x80:
+                length = parameter_1 | parameter_2 << 8
+                if len(self._buffer) < 6 + length:
+                    return
+                message = AptMessage(message_id, None, self._buffer[6:6+length], time.perf_counter())
+                self._buffer = self._buffer[6+length:]
+            else:
+                message = AptMessage(message_id, (parameter_1, parameter_2), b"", time.perf_counter())
+                self._buffer = self._buffer[6:]
+            self._dispatch(message)
+
+
+    def _dispatch(self, message):
+        with self._lock:
+            waiters = self._waiters.pop(message.id, [])
+            subscribers = list(self._subscribers.get(message.id, []))
+
+        for waiter in waiters:
+            waiter.set(message)
+        for callback in subscribers:
+            callback(message)
+
+
+class _MessageWaiter:
+    def __init__(self, message_id):
+        self.message_id = message_id
+        self._event = threading.Event()
+        self._message = None
+
+
+    def set(self, message):
+        self._message = message
+        self._event.set()
+
+
+    def wait(self, timeout=None):
+        if not self._event.wait(timeout):
+            raise TimeoutError("The motor did not send {} within {} s".format(apt.message_name(self.message_id), timeout))
+        return self._message
+
+
 class Motor:
     """
     Object that sends to and receive data from a ThorLabs' motor.
@@ -50,23 +245,18 @@ class Motor:
     This manual also present the available instructions for each type of motor and describes how they behave.
     Here, this docstring explains in summary how APT is used.
 
-    Messages are a sequence of bits of varying length. They are sent via the "write" method of the "serial" object
-    connected to the given motor USB port. They are created using Python's "struct.pack" function. The first argument
-    of this function contains a format string in which each character represent the type of parameter in the sequence:
-        'B': 8 bits;
-        'H': 16-bit unsigned integer;
-        'I': 32-bit signed integer.
-    The complete list can be found at https://docs.python.org/3/library/struct.html. Because motors read little-endian
-    values, the character '<' must be added in the format string.
-
-    Ex: To send a message containing a 16-bit unsigned integer followed by a byte (8 bits), the format string is "<HB":
-            struct.pack("<HB", ...)
+    Messages are a sequence of bytes of varying length. They are sent via the "write" method of the "serial" object
+    connected to the given motor USB port, and read by the AptMessageReader thread. They are encoded and decoded by
+    the messages of the apt module, named after the instructions of the manual without their "MGMSG_" prefix.
 
-    Types used in messages are described at page 39 of ThorLabs' documentation (as of Issue 30). The second argument
-    of "struck.pack" is the list of values to store in the sequence (using the types of the format string).
+    Ex: To request the position of the motor:
+            apt.MOT_REQ_POSCOUNTER.encode(destination, source, channel)
+        and to read the position of the reply:
+            channel, position = apt.MOT_GET_POSCOUNTER.decode(reply.data)
 
-    In the APT protocol, every message must start the ID of the instruction, a 16-bit unsigned integer ("H"). The
-    other bits are optional: they depend on the instruction asked (read the instruction's description in the manual).
+    In the APT protocol, every message must start the ID of the instruction, a 16-bit unsigned integer. The other
+    bytes depend on the instruction asked (read the instruction's description in the manual). Types used in messages
+    are described at page 39 of ThorLabs' documentation (as of Issue 30).
 
     The motors represents positions in their intrinsic integer unit which this class calls MU. The Motor class provides
     the conversion factors for each unit used.
@@ -95,11 +285,24 @@ class Motor:
 
         self.communicator = serial.Serial(port=usb_port_location, baudrate=baud_rate, bytesize=data_bits,
                                             parity=parity, stopbits=stop_bits, timeout=0.1)
-
-        # Get hardware info; MGMSG_HW_REQ_INFO; may be required by a K Cube to allow confirmation Rx messages
-        self.communicator.write(pack('<HBBBB', 0x0005, 0x00, 0x00, 0x50, 0x01))
         self.flush()
 
+        # The position is requested at each point of an acquisition, its message never changes
+        self._request_position = apt.MOT_REQ_POSCOUNTER.encode(self.destination, self.source, self.channel)
+
+        # Every message of the motor is read by this thread, commands wait for their reply instead of sleeping
+        self.messages = AptMessageReader(self.communicator, self.source)
+        self._stopped_waiter = None
+        # Parameters of the moves, to bound the time of each move
+        self._step_size = 0  # um
+        self._velocity = jog_settings["max velocity"]  # mm/s
+
+        # Get hardware info; may be required by a K Cube to allow confirmation Rx messages. The reply is not used.
+        try:
+            self.messages.request(apt.HW_REQ_INFO.encode(self.destination, self.source), apt.HW_GET_INFO.id)
+        except TimeoutError as error:
+            warn("{}, the motor is used without its hardware info".format(error))
+
         self.enable_stage()
         self.home()
 
@@ -107,25 +310,18 @@ class Motor:
 
 
     def enable_stage(self):
-        # Enable Stage; MGMSG_MOD_SET_CHANENABLESTATE
-        self.communicator.write(pack('<HBBBB', 0x0210, self.channel, 0x01, self.destination, self.source))
-        self._ensure_motor_received_instruction()
-        self.flush()
+        self.communicator.write(apt.MOD_SET_CHANENABLESTATE.encode(self.destination, self.source, self.channel, 0x01))
+        self._ensure_motor_received_instruction(apt.MOD_REQ_CHANENABLESTATE, apt.MOD_GET_CHANENABLESTATE)
 
 
     def disable_stage(self):
-        # Disable Stage; MGMSG_MOD_SET_CHANENABLESTATE
-        self.communicator.write(pack('<HBBBB', 0x0210, self.channel, 0x02, self.destination, self.source))
-        self._ensure_motor_received_instruction()
-        self.flush()
+        self.communicator.write(apt.MOD_SET_CHANENABLESTATE.encode(self.destination, self.source, self.channel, 0x02))
+        self._ensure_motor_received_instruction(apt.MOD_REQ_CHANENABLESTATE, apt.MOD_GET_CHANENABLESTATE)
 
 
     def get_absolute_position(self):
-        # Request Position; MGMSG_MOT_REQ_POSCOUNTER
-        self.communicator.write(pack('<HBBBB', 0x0411, self.channel, 0x00, self.destination, self.source))
-
-        # Read back position returned by the cube; Rx message MGMSG_MOT_GET_POSCOUNTER
-        header, chan_dent, position_in_mu = unpack('<6sHI', self.communicator.read(12))
+        reply = self.messages.request(self._request_position, apt.MOT_GET_POSCOUNTER.id)
+        chan_dent, position_in_mu = apt.MOT_GET_POSCOUNTER.decode(reply.data)
         return self.convert_MU_to_position(position_in_mu)
 
 
@@ -142,63 +338,95 @@ class Motor:
 
 
     def home(self):
-        # Home Stage; MGMSG_MOT_MOVE_HOME
-        self.communicator.write(pack('<HBBBB', 0x0443, self.channel, 0x00, self.destination, self.source))
-
-        # Wait until stage homed; MGMSG_MOT_MOVE_HOMED
-        Rx = ''
-        Homed = pack('<H',0x0444)
-        while Rx != Homed:
-            Rx = self.communicator.read(2)
-        self.flush()
+        # Wait until stage homed
+        self._request_move(apt.MOT_MOVE_HOME.encode(self.destination, self.source, self.channel), apt.MOT_MOVE_HOMED,
+                           self._move_duration(move_timeout["travel"]*1e3, jog_settings["max velocity"]))
 
 
     def set_step_size(self, step_size):
-        # Set job params; MGMSG_MOT_SET_JOGPARAMS
-        self.communicator.write(pack('<HBBBBHHIIIIH', 0x0416, 0x16, 0x00, self.destination|0x80, self.source, self.channel,
+        self.communicator.write(apt.MOT_SET_JOGPARAMS.encode(self.destination, self.source, self.channel,
                         jog_settings["jog mode"],
                         self.convert_position_to_MU(step_size),
                         self.convert_velocity_to_MU(jog_settings["min velocity"]),
                         self.convert_acceleration_to_MU(jog_settings["acceleration"]),
                         self.convert_velocity_to_MU(jog_settings["max velocity"]),
                         jog_settings["stop mode"]))
-        self._ensure_motor_received_instruction()
+        self._ensure_motor_received_instruction(apt.MOT_REQ_JOGPARAMS, apt.MOT_GET_JOGPARAMS)
+        self._step_size = step_size
 
 
     def jog(self, forward):
-        # Do a jog; MGMSG_MOT_MOVE_JOG
         direction = 0x01 if forward else 0x02
-        self.communicator.write(pack('<HBBBB', 0x046A, self.channel, direction, self.destination, self.source))
-        self._ensure_motor_received_instruction()
-        self.wait_until_move_completed()
+        self._request_move(apt.MOT_MOVE_JOG.encode(self.destination, self.source, self.channel, direction),
+                           apt.MOT_MOVE_COMPLETED, self._move_duration(self._step_size, jog_settings["max velocity"]))
 
 
     def move_to(self, position, relative=False):
-        if relative:
-            # Move to relative position; MGMSG_MOT_MOVE_RELATIVE (long version)
-            self.communicator.write(pack('<HBBBBHI', 0x0448, 0x06, 0x00, self.destination|0x80, self.source, self.channel,
-                              self.convert_position_to_MU(position)))
-        else:
-            # Move to absolute position; MGMSG_MOT_MOVE_ABSOLUTE (long version)
-            self.communicator.write(pack('<HBBBBHI', 0x0453, 0x06, 0x00, self.destination|0x80, self.source, self.channel,
-                              self.convert_position_to_MU(position)))
+        move = apt.MOT_MOVE_RELATIVE if relative else apt.MOT_MOVE_ABSOLUTE
+        distance = position if relative else position - self.get_absolute_position()
+        self._request_move(move.encode(self.destination, self.source, self.channel, self.convert_position_to_MU(position)),
+                           apt.MOT_MOVE_COMPLETED, self._move_duration(distance, self._velocity))
 
-        self._ensure_motor_received_instruction()
-        self.wait_until_move_completed()
+
+    def set_velocity(self, velocity):
+        """ velocity in mm/s, limited to the max velocity of the jogs. Returns the velocity applied, read back from the
+        motor.
+        """
+        self.communicator.write(apt.MOT_SET_VELPARAMS.encode(self.destination, self.source, self.channel,
+                        self.convert_velocity_to_MU(jog_settings["min velocity"]),
+                        self.convert_acceleration_to_MU(jog_settings["acceleration"]),
+                        self.convert_velocity_to_MU(min(velocity, jog_settings["max velocity"]))))
+        reply = self._ensure_motor_received_instruction(apt.MOT_REQ_VELPARAMS, apt.MOT_GET_VELPARAMS)
+        chan_dent, min_velocity, acceleration, max_velocity = apt.MOT_GET_VELPARAMS.decode(reply.data)
+        self._velocity = max_velocity/self.unit_conversions["MU/(mm/s)"]
+        return self._velocity
 
 
-    def wait_until_move_completed(self):
-        Rx = ''
-        Moved = pack('<H',0x0464)
-        while Rx != Moved:
-            # Check if moving; MGMSG_MOT_MOVE_COMPLETED
-            Rx = self.communicator.read(2)
-            time.sleep(0.1)
+    def move_at_velocity(self, forward):
+        # Move at the velocity of the velocity params until stopped
+        direction = 0x01 if forward else 0x02
+        self.communicator.write(apt.MOT_MOVE_VELOCITY.encode(self.destination, self.source, self.channel, direction))
 
 
     def stop(self):
-        # Stop any movement; MGMSG_MOT_MOVE_STOP
-        self.communicator.write(pack('<HBBBB',0x0465, 0x02, self.channel, self.destination, self.source))
+        # Stop any movement, smoothly
+        self._stopped_waiter = self.messages.expect(apt.MOT_MOVE_STOPPED.id)
+        self.communicator.write(apt.MOT_MOVE_STOP.encode(self.destination, self.source, self.channel, 0x02))
+
+
+    def wait_until_stopped(self):
+        # The smooth stop decelerates from the velocity of the move
+        if self._stopped_waiter is not None:
+            waiter, self._stopped_waiter = self._stopped_waiter, None
+            try:
+                waiter.wait(move_timeout["factor"]*self._move_duration(0, self._velocity) + move_timeout["margin"])
+            finally:
+                self.messages.forget(waiter)
+
+
+    def subscribe_to_status_updates(self, callback):
+        """
+        Calls "callback" with the position in um, the status bits and the time.perf_counter() timestamp of each status
+        update of the motor, from the thread of the reader.
+        """
+        def decode(message):
+            chan_dent, position_in_mu, velocity, reserved, status_bits = apt.MOT_GET_DCSTATUSUPDATE.decode(message.data)
+            callback(self.convert_MU_to_position(position_in_mu), status_bits, message.timestamp)
+
+        # Status of a DC servo cube
+        self.messages.subscribe(apt.MOT_GET_DCSTATUSUPDATE.id, decode)
+        self.communicator.write(apt.HW_START_UPDATEMSGS.encode(self.destination, self.source))
+
+
+    def latency_statistics(self):
+        """ Statistics of the time between each command and its reply, see AptMessageReader.latency_statistics. """
+        return {apt.message_name(command_id): statistics
+                for command_id, statistics in self.messages.latency_statistics().items()}
+
+
+    def close(self):
+        self.messages.stop()
+        self.communicator.close()
 
 
     def flush(self):
@@ -226,5 +454,22 @@ class Motor:
         return int(round(self.unit_conversions["MU/(mm/s^2)"]*acceleration))
 
 
-    def _ensure_motor_received_instruction(self):
-        time.sleep(0.1)
+    def _move_duration(self, distance, velocity):
+        """ Time in s of a move of "distance" um at "velocity" mm/s, plus the time to accelerate and decelerate. """
+        duration = abs(distance)/1e3/velocity if velocity > 0 else 0
+        return duration + velocity/jog_settings["acceleration"]
+
+
+    def _request_move(self, command, reply, duration):
+        """ Writes the command of a move and waits for its "reply" at most the timeout of a move of "duration" s. """
+        try:
+            self.messages.request(command, reply.id, timeout=move_timeout["factor"]*duration + move_timeout["margin"])
+        except TimeoutError:
+            # The stage must not keep moving once the move is given up
+            self.communicator.write(apt.MOT_MOVE_STOP.encode(self.destination, self.source, self.channel, 0x01))
+            raise
+
+
+    def _ensure_motor_received_instruction(self, request, reply):
+        # The motor handles its messages in order: the reply to a request sent after an instruction acknowledges it
+        return self.messages.request(request.encode(self.destination, self.source, self.channel), reply.id)
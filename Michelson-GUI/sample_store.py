@@ -0,0 +1,94 @@
+import threading
+
+import numpy as np
+
+
+class SampleStore:
+    """
+    Samples of an acquisition stored by columns in NumPy arrays.
+
+    The arrays hold more rows than there are samples and double their size when they are full, so appending a sample
+    takes a constant time on average whatever the length of the scan. "view" returns views of the stored rows, without
+    copying them. The minimum and maximum of each column are updated with each sample.
+
+    The rows are appended by the acquisition thread while the interface reads them: the methods are protected by a
+    lock. A view stays valid when the arrays are reallocated, it then refers to the previous arrays, which hold the
+    same rows.
+    """
+
+    columns = ["absolute positions", "relative positions", "voltages", "timestamps", "read counts", "standard errors"]
+
+
+    def __init__(self, capacity=1024):
+        self._lock = threading.Lock()
+        self._initial_capacity = capacity
+        self.clear()
+
+
+    def __len__(self):
+        return self._count
+
+
+    def clear(self):
+        with self._lock:
+            self._arrays = {column: np.empty(self._initial_capacity) for column in self.columns}
+            self._count = 0
+            self.minimum = {column: np.inf for column in self.columns}
+            self.maximum = {column: -np.inf for column in self.columns}
+
+
+    def append(self, absolute_position, relative_position, voltage, timestamp, read_count, standard_error):
+        row = (absolute_position, relative_position, voltage, timestamp, read_count, standard_error)
+        with self._lock:
+            self._reserve(self._count + 1)
+
+            for column, value in zip(self.columns, row):
+                self._arrays[column][self._count] = value
+                if value < self.minimum[column]:
+                    self.minimum[column] = value
+                if value > self.maximum[column]:
+                    self.maximum[column] = value
+            self._count += 1
+
+
+    def extend(self, rows):
+        """ Appends the rows of a dictionary of columns, such as the one returned by "view". """
+        length = len(rows[self.columns[0]])
+        if length == 0:
+            return
+
+        with self._lock:
+            self._reserve(self._count + length)
+
+            for column in self.columns:
+                values = rows[column]
+                self._arrays[column][self._count:self._count+length] = values
+                self.minimum[column] = min(self.minimum[column], np.min(values))
+                self.maximum[column] = max(self.maximum[column], np.max(values))
+            self._count += length
+
+
+    def view(self, start=0, stop=None):
+        """ Columns of the rows from "start" to "stop" (all the rows by default), as views of the stored arrays. """
+        with self._lock:
+            stop = self._count if stop is None else min(stop, self._count)
+            return {column: array[start:stop] for column, array in self._arrays.items()}
+
+
+    def to_lists(self):
+        """ Columns of all the rows as lists, for JSON files. """
+        return {column: values.tolist() for column, values in self.view().items()}
+
+
+    def _reserve(self, count):
+        capacity = len(self._arrays[self.columns[0]])
+        if count <= capacity:
+            return
+
+        capacity = max(capacity, 1)
+        while capacity < count:
+            capacity *= 2
+        for column, array in self._arrays.items():
+            grown = np.empty(capacity)
+            grown[:self._count] = array[:self._count]
+            self._arrays[column] = grown
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+pytest.importorskip("termios")  # The fake cube runs behind a pseudo-terminal
+
+import apt
+import motor as motor_module
+from fake_cube import FakeCube
+from motor import Motor
+
+
+class SilentCube(FakeCube):
+    """ Cube that never sends its hardware info. """
+    def _handle(self, message_id, *args):
+        if message_id != apt.HW_REQ_INFO.id:
+            super()._handle(message_id, *args)
+
+
+@pytest.fixture
+def cube():
+    cube = FakeCube(move_time=0.05)
+    yield cube
+    cube.close()
+
+
+@pytest.fixture
+def motor(cube):
+    motor = Motor(cube.port, "ZST225B")
+    yield motor
+    motor.close()
+
+
+def test_initialization_homes_the_motor(motor):
+    assert motor.get_absolute_position() == 0
+    assert motor.get_relative_position() == 0
+
+
+def test_position_counter(cube, motor):
+    cube.position = motor.convert_position_to_MU(12.5)
+    assert motor.get_absolute_position() == pytest.approx(12.5, abs=1e-3)
+
+
+def test_jog(motor):
+    motor.set_step_size(10)
+    motor.jog(True)
+    assert motor.get_absolute_position() == pytest.approx(10, abs=1e-3)
+    motor.jog(False)
+    motor.jog(False)
+    assert motor.get_absolute_position() == pytest.approx(-10, abs=1e-3)
+
+
+def test_move_to(motor):
+    motor.move_to(20)
+    assert motor.get_absolute_position() == pytest.approx(20, abs=1e-3)
+    motor.move_to(5, relative=True)
+    assert motor.get_absolute_position() == pytest.approx(25, abs=1e-3)
+    motor.move_to(3)
+    assert motor.get_absolute_position() == pytest.approx(3, abs=1e-3)
+
+
+def test_framing_skips_stray_bytes(cube, motor):
+    cube.position = motor.convert_position_to_MU(7)
+    cube.inject(b"\x00\x13\x37\x00\x00")
+    assert motor.get_absolute_position() == pytest.approx(7, abs=1e-3)
+    # Stray bytes in the middle of the replies
+    motor.set_step_size(1)
+    cube.inject(b"\xff")
+    motor.jog(True)
+    assert motor.get_absolute_position() == pytest.approx(8, abs=1e-3)
+
+
+def test_missing_hardware_info_warns():
+    cube = SilentCube()
+    try:
+        with pytest.warns(UserWarning, match="without its hardware info"):
+            motor = Motor(cube.port, "ZST225B")
+        assert motor.get_absolute_position() == 0
+        motor.close()
+    finally:
+        cube.close()
+
+
+def test_move_timeout_stops_the_motor(monkeypatch):
+    monkeypatch.setitem(motor_module.move_timeout, "factor", 1)
+    monkeypatch.setitem(motor_module.move_timeout, "margin", 0.1)
+    cube = FakeCube(move_time=0.6)
+    motor = Motor(cube.port, "ZST225B")
+    try:
+        motor.set_step_size(10)
+        with pytest.raises(TimeoutError):
+            motor.jog(True)
+        assert not motor.messages._waiters.get(apt.MOT_MOVE_COMPLETED.id)
+
+        # The stop sent after the timeout cancels the jog, the motor never reaches its step
+        time.sleep(0.6)
+        assert motor.get_absolute_position() == 0
+    finally:
+        motor.close()
+        cube.close()
@@ -1,3 +1,5 @@
+import time
+
 import numpy as np
 
 
@@ -10,3 +12,19 @@ class Voltmeter:
     def read(self):
         self.t += 0.05
         return np.sin(self.t)
+
+
+    def read_many(self, n, rate=None):
+        """
+        Reads "n" voltages sampled every 1/rate seconds in a single timed burst, or as fast as possible when "rate" is
+        None, and returns them as a NumPy array. The samples are timed by the voltmeter instead of one query per
+        sample with a sleep in between.
+        """
+        if n == 0:
+            return np.empty(0)
+        t = self.t + 0.05*np.arange(1, n+1)
+        self.t = t[-1]
+
+        if rate is not None and n > 1:
+            time.sleep((n-1)/rate)  # Duration of the burst, from the first to the last sample
+        return np.sin(t)
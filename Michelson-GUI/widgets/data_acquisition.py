@@ -17,9 +17,15 @@ class DataAcquisitionLayout(QtWidgets.QVBoxLayout):
         self.widgets_to_disable = []
         self._acquiring = False
 
-        self._interferogram = InterferogramDynamicCanvas(voltmeter)
+        self._interferogram = InterferogramDynamicCanvas(voltmeter, data_acquirer.get_samples())
         self._data_acquirer = data_acquirer
         data_acquirer.add_callback(self._interferogram.draw_frame)
+        data_acquirer.add_error_callback(self._show_acquisition_error)
+
+        # The acquisition runs in its own thread, its data is displayed at the pace of this timer
+        self._dispatch_timer = QtCore.QTimer()
+        self._dispatch_timer.setInterval(config.acquisition_display_interval)
+        self._dispatch_timer.timeout.connect(self._data_acquirer.dispatch)
         self.update_functions.append(self._interferogram.update_voltmeter)
 
         self.addWidget(self._interferogram)
@@ -29,7 +35,7 @@ class DataAcquisitionLayout(QtWidgets.QVBoxLayout):
         self.acquire_data_button.pressed.connect(self._change_button_text)
         self.acquire_data_button.pressed.connect(toggle_widgets_function)
         self.acquire_data_button.pressed.connect(toggle_refresh_function)
-        self.acquire_data_button.pressed.connect(self._toggle_motor_state)  # starts infinite loop, must be called last
+        self.acquire_data_button.pressed.connect(self._toggle_motor_state)
 
         save_button = QtWidgets.QPushButton("Enregistrer sous")
         save_button.pressed.connect(self.open_save_data_dialog)
@@ -59,11 +65,22 @@ class DataAcquisitionLayout(QtWidgets.QVBoxLayout):
 
         if self._acquiring:
             self._data_acquirer.clear()
-            self._data_acquirer.acquire()  # infinite loop
+            self._data_acquirer.start()
+            self._dispatch_timer.start()
         else:
             self._data_acquirer.stop()
+            self._dispatch_timer.stop()
+            self._data_acquirer.dispatch()  # Last point acquired before the thread stopped
             self.save_data(os.path.join(os.path.expanduser("~"), "_tmp_michelson_data.json"))
 
 
+    def _show_acquisition_error(self, error):
+        # The acquisition ended by itself, the interface is reset as if it was stopped by its button
+        if self._acquiring:
+            self.acquire_data_button.click()
+        QtWidgets.QMessageBox.warning(None, "Erreur d'acquisition",
+                                      "L'acquisition a été interrompue:\n{}".format(error))
+
+
     def _change_button_text(self):
         self.acquire_data_button.setText("Arrêter l'acquisition" if not self._acquiring else "Acquérir des données")
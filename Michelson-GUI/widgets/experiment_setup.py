@@ -115,6 +115,12 @@ class ExperimentalSetupConfiguration(QtWidgets.QVBoxLayout):
         self.optimize_checkbox.stateChanged.connect(self._toggle_average_textbox)
         radio_buttons_layout.addWidget(self._append_widget(self.optimize_checkbox))
 
+        # The number of measures of the fly scan is not adaptive, the two options exclude each other
+        self.fly_scan_checkbox = QtWidgets.QCheckBox("Balayage continu")
+        self.fly_scan_checkbox.toggled.connect(self._uncheck_optimize_checkbox)
+        self.optimize_checkbox.toggled.connect(self._uncheck_fly_scan_checkbox)
+        radio_buttons_layout.addWidget(self._append_widget(self.fly_scan_checkbox))
+
         spacer = QtWidgets.QSpacerItem(1, 10)
         labels_layout = QtWidgets.QVBoxLayout()
         labels_layout.addWidget(QtWidgets.QLabel("Taille des pas"))
@@ -147,7 +153,8 @@ class ExperimentalSetupConfiguration(QtWidgets.QVBoxLayout):
 
 
     def get_setup_information(self):
-        parameters = {"forward": self._radio_move_forward.isChecked()}
+        parameters = {"forward": self._radio_move_forward.isChecked(), "optimize": self.optimize_checkbox.isChecked(),
+                      "fly scan": self.fly_scan_checkbox.isChecked()}
         for parameter, textbox in zip(self._textboxes_parameters, self._textboxes):
             parameters[parameter] = float(textbox.text())
 
@@ -158,6 +165,16 @@ class ExperimentalSetupConfiguration(QtWidgets.QVBoxLayout):
         self._textboxes[2].setEnabled(not self.optimize_checkbox.isChecked())
 
 
+    def _uncheck_optimize_checkbox(self, checked):
+        if checked:
+            self.optimize_checkbox.setChecked(False)
+
+
+    def _uncheck_fly_scan_checkbox(self, checked):
+        if checked:
+            self.fly_scan_checkbox.setChecked(False)
+
+
     def _append_widget(self, widget):
         self.widgets_to_disable.append(widget)
         return widget
@@ -1,5 +1,5 @@
 import numpy as np
-from matplotlib import patches, pyplot
+from matplotlib import patches
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
@@ -8,18 +8,33 @@ import matplotlib_config
 
 
 class InterferogramDynamicCanvas(FigureCanvasQTAgg):
-    def __init__(self, voltmeter, **kwargs):
+    """
+    Interferogram of the acquisition and voltmeter. The plotted line is given views of the SampleStore "samples" of
+    the DataAcquirer, the canvas keeps no store of its own.
+
+    A frame only redraws the line and the cursors over a copy of the rest of the figure (blitting). The whole figure is
+    drawn again only when the axes limits change: when the points leave the x axis, its limits are extended by
+    "growth_margin" times the range of the points in the direction of the scan, so the following frames fit in them.
+    """
+
+    growth_margin = 0.25
+
+
+    def __init__(self, voltmeter, samples, **kwargs):
 
         self._voltmeter = voltmeter
+        self._samples = samples
 
         self.fig = Figure(**kwargs)
 
-        self._ax_absolute = pyplot.subplot2grid((1, 12), (0, 0), colspan=11, fig=self.fig)
+        grid = self.fig.add_gridspec(1, 12)
+        self._ax_absolute = self.fig.add_subplot(grid[0, :11])
         self._ax_relative = self._ax_absolute.twiny()  # Contains invisible line that shows relative positions
 
-        self._voltage_absolute = Line2D([], [], color='#008080', ls='-', marker=".", clip_on=True)
+        self._voltage_absolute = Line2D([], [], color='#008080', ls='-', marker=".", clip_on=True, animated=True)
         self._ax_absolute.add_line(self._voltage_absolute)
-        self._position_cursor = self._ax_absolute.axvline(0, color=matplotlib_config.midblack, ls="--", lw=2)
+        self._position_cursor = self._ax_absolute.axvline(0, color=matplotlib_config.midblack, ls="--", lw=2,
+                                                          animated=True)
 
         self._ax_absolute.set_xlabel("Position absolue [µm]")
         self._ax_absolute.set_ylabel("Voltage [-]")
@@ -27,9 +42,9 @@ class InterferogramDynamicCanvas(FigureCanvasQTAgg):
 
         self._voltage_relative = Line2D([], [], ls='')
         self._ax_relative.add_line(self._voltage_relative)
-        self._ax_relative.set_xlabel("Position relative [µm]")
+        self._ax_relative.set_xlabel("Position relative [µm]")
 
-        self._voltmeter_ax = pyplot.subplot2grid((1, 12), (0, 11), fig=self.fig)
+        self._voltmeter_ax = self.fig.add_subplot(grid[0, 11])
         self._voltmeter_ax.set_ylim(0, 1)
         self._voltmeter_ax.yaxis.tick_right()
         self._voltmeter_ax.get_xaxis().set_visible(False)
@@ -37,14 +52,20 @@ class InterferogramDynamicCanvas(FigureCanvasQTAgg):
         self._voltmeter_screen = VoltmeterScreen(0.2)
         for p in self._voltmeter_screen.get_patches():
             self._voltmeter_ax.add_patch(p)
+        self._voltmeter_screen.cursor.set_animated(True)
+
+        self._animated_artists = [self._voltage_absolute, self._position_cursor, self._voltmeter_screen.cursor]
+        self._background = None
+        self._fit_xaxis = True  # Fit the x axis to the points of a new scan
 
         self.fig.tight_layout()
         FigureCanvasQTAgg.__init__(self, self.fig)
+        self.mpl_connect("draw_event", self._save_background)
 
 
     def update_voltmeter(self):
         self._voltmeter_screen.update(self._voltmeter.read())
-        self.fig.canvas.draw()
+        self._blit()
         self.fig.canvas.flush_events()
 
 
@@ -57,29 +78,72 @@ class InterferogramDynamicCanvas(FigureCanvasQTAgg):
         voltages = data["voltages"]
 
         self._voltmeter_screen.update(voltages[-1])
-        self._position_cursor.set_xdata(absolute_positions[-1]) # line plotted on absolute axis
+        self._position_cursor.set_xdata([absolute_positions[-1]]*2) # line plotted on absolute axis
 
         if acquiring:
-            self._voltage_absolute.set_data([absolute_positions, voltages])
-            self._voltage_relative.set_data([relative_positions, voltages])
-
-            self._rescale_xaxis(self._ax_absolute, absolute_positions)
-            self._rescale_xaxis(self._ax_relative, relative_positions)
+            # Views of the rows of the acquisition up to the dispatched ones, no copy of the whole scan per frame
+            samples = self._samples.view(0, data["first row"] + len(voltages))
+            self._voltage_absolute.set_data([samples["absolute positions"], samples["voltages"]])
+            self._voltage_relative.set_data([samples["relative positions"], samples["voltages"]])
+
+            # Both axes are fitted at the same frame, their points have the same range
+            if data["first row"] == 0:
+                self._fit_xaxis = True
+            rescaled = self._rescale_xaxis(self._ax_absolute, data["minimum"]["absolute positions"],
+                                           data["maximum"]["absolute positions"], self._fit_xaxis)
+            rescaled |= self._rescale_xaxis(self._ax_relative, data["minimum"]["relative positions"],
+                                            data["maximum"]["relative positions"], self._fit_xaxis)
+            if rescaled:
+                self._fit_xaxis = False
 
         else: # Display motor position on figure if no data collected
-            self._rescale_xaxis_if_out_of_range(self._ax_absolute, absolute_positions[-1])
-            self._rescale_xaxis_if_out_of_range(self._ax_relative, relative_positions[-1])
+            rescaled = self._rescale_xaxis_if_out_of_range(self._ax_absolute, absolute_positions[-1])
+            rescaled |= self._rescale_xaxis_if_out_of_range(self._ax_relative, relative_positions[-1])
 
-        self.fig.canvas.draw()
-        self.fig.canvas.flush_events()
+        if rescaled:
+            self.draw()
+        else:
+            self._blit()
 
 
-    @staticmethod
-    def _rescale_xaxis(ax, data):
-        min_value, max_value = min(data), max(data)
+    def _save_background(self, event):
+        """ Copies the figure without its animated artists after each full draw, then draws them over it. """
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._draw_animated_artists()
+
 
-        if min_value != max_value:
+    def _blit(self):
+        if self._background is None:
+            self.draw()
+            return
+
+        self.restore_region(self._background)
+        self._draw_animated_artists()
+        self.blit(self.fig.bbox)
+
+
+    def _draw_animated_artists(self):
+        for artist in self._animated_artists:
+            self.fig.draw_artist(artist)
+
+
+    @classmethod
+    def _rescale_xaxis(cls, ax, min_value, max_value, reset=False):
+        """ Fits the x axis to the points when they leave it, or when "reset". Returns whether its limits changed. """
+        if min_value == max_value:
+            return False
+
+        xlim = ax.get_xlim()
+        if reset:
             ax.set_xlim((min_value, max_value))
+            return True
+        if xlim[0] <= min_value and max_value <= xlim[1]:
+            return False
+
+        margin = cls.growth_margin*(max_value - min_value)
+        ax.set_xlim((min_value - margin if min_value < xlim[0] else xlim[0],
+                     max_value + margin if max_value > xlim[1] else xlim[1]))
+        return True
 
 
     @staticmethod
@@ -88,8 +152,10 @@ class InterferogramDynamicCanvas(FigureCanvasQTAgg):
         min_value = min([xlim[0], point])
         max_value = max([xlim[1], point])
 
-        if min_value != max_value:
+        if min_value != max_value and (min_value, max_value) != tuple(xlim):
             ax.set_xlim((min_value, max_value))
+            return True
+        return False
 
 
 class VoltmeterScreen:
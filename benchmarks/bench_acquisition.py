@@ -0,0 +1,133 @@
+""" Compares the time per acquired point of the Michelson-GUI acquisition when
+the voltages of a point are read one at a time with a sleep in between and
+when they are read in a single timed burst (Voltmeter.read_many), with the
+test motor and a simulated voltmeter reading fringes, and with the adaptive
+number of measures of "Optimiser le moyennage" (config.adaptive_averaging).
+The table also gives the average number of measures per point and the largest
+standard error of a point.
+
+The last two rows compare the scan by steps with the fly scan ("Balayage
+continu") on a test motor whose jogs last as long as those of the motor: the
+travel at the max velocity of the jogs, its acceleration and the latency of the
+reply of the motor.
+
+    python benchmarks/bench_acquisition.py [--points 30] [--measures 10] [--delay 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Michelson-GUI"))
+
+from data_acquirer import DataAcquirer
+from motor import MotorTest, jog_settings
+
+
+class TimedMotorTest(MotorTest):
+    """
+    Test motor whose jogs take the time of Motor.jog: the travel at the max velocity of the jogs, its acceleration
+    and deceleration, and the latency of the reply of the motor.
+    """
+
+    def __init__(self, latency=0.005):
+        super().__init__()
+        self._latency = latency
+
+
+    def jog(self, forward):
+        velocity = jog_settings["max velocity"]*1e3  # µm/s
+        acceleration = jog_settings["acceleration"]*1e3  # µm/s^2
+        time.sleep(self._latency + self.step/velocity + velocity/acceleration)
+        super().jog(forward)
+
+
+    def set_velocity(self, velocity):
+        time.sleep(self._latency)  # Motor._ensure_motor_received_instruction
+        return super().set_velocity(velocity)
+
+
+class FringeVoltmeter:
+    """
+    Test voltmeter reading the fringes of a Michelson interferometer at the position of the test motor (µm). The
+    vibrations of the mirror make the voltage noisier on the slopes of the fringes than on their extrema.
+    """
+
+    def __init__(self, motor, wavelength=0.6328, vibration=0.002, noise=0.002, seed=0):
+        self._motor = motor
+        self._wavelength = wavelength
+        self._vibration = vibration
+        self._noise = noise
+        self._rng = np.random.default_rng(seed)
+
+    def read(self):
+        return self.read_many(1)[0]
+
+    def read_many(self, n, rate=None):
+        # The motor may move during the burst
+        timestamps = time.perf_counter() + (np.arange(n)/rate if rate is not None else np.zeros(n))
+        positions = self._motor.position_at(timestamps) + self._rng.normal(0, self._vibration, n)
+        voltages = np.cos(4*np.pi*positions/self._wavelength) + self._rng.normal(0, self._noise, n)
+        if rate is not None and n > 1:
+            time.sleep((n-1)/rate)
+        return voltages
+
+
+class SingleReadVoltmeter:
+    """ Voltmeter without "read_many", the acquirer then reads and sleeps for each measure. """
+
+    def __init__(self, voltmeter):
+        self._voltmeter = voltmeter
+
+    def read(self):
+        return self._voltmeter.read()
+
+
+def acquire(points, measures, delay, burst=True, optimize=False, fly_scan=False, timed_motor=False):
+    parameters = {"step size": 0.02, "measure number": measures, "delay": delay, "forward": True,
+                  "optimize": optimize, "fly scan": fly_scan}
+    motor = TimedMotorTest() if timed_motor else MotorTest()
+    voltmeter = FringeVoltmeter(motor) if burst else SingleReadVoltmeter(FringeVoltmeter(motor))
+    acquirer = DataAcquirer(motor, voltmeter, lambda: parameters, lambda: 1.0)
+
+    acquirer.start()
+    # An error ends the acquisition, see DataAcquirer.dispatch
+    while acquirer.is_acquiring() and len(acquirer.get_data()["voltages"]) < points:
+        time.sleep(0.01)
+    acquirer.stop()
+
+    data = acquirer.get_data()
+    scan_time = data["timestamps"][points-1] - data["timestamps"][0]
+    return dict(acquirer.timing_breakdown(), reads=np.mean(data["read counts"]),
+                error=np.max(data["standard errors"]), scan=scan_time)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=30)
+    parser.add_argument("--measures", type=int, default=10, help="measures averaged per point")
+    parser.add_argument("--delay", type=float, default=10, help="delay between measures in ms")
+    args = parser.parse_args()
+
+    results = {
+            "read and sleep": acquire(args.points, args.measures, args.delay, burst=False),
+            "timed burst": acquire(args.points, args.measures, args.delay),
+            "adaptive": acquire(args.points, args.measures, args.delay, optimize=True),
+            "timed jogs": acquire(args.points, args.measures, args.delay, timed_motor=True),
+            "fly scan": acquire(args.points, args.measures, args.delay, fly_scan=True, timed_motor=True)
+        }
+
+    parts = ["positions", "voltages", "motor", "total"]
+    print("{:<16}".format("ms per point") + "".join("{:>11}".format(part) for part in parts)
+          + "{:>11}{:>14}".format("reads", "max error"))
+    for name, breakdown in results.items():
+        print("{:<16}".format(name) + "".join("{:>11.3f}".format(breakdown[part]*1e3) for part in parts)
+              + "{:>11.1f}{:>14.4f}".format(breakdown["reads"], breakdown["error"]))
+
+    gain = results["read and sleep"]["total"]/results["timed burst"]["total"]
+    print("Timed burst: {:.2f}x faster per point".format(gain))
+    gain = results["timed jogs"]["scan"]/results["fly scan"]["scan"]
+    print("Fly scan: {:.2f}x faster scan of {} points ({:.2f} s instead of {:.2f} s)".format(
+            gain, args.points, results["fly scan"]["scan"], results["timed jogs"]["scan"]))
@@ -0,0 +1,79 @@
+""" Benchmarks the APT messages of the Michelson-GUI motor: encoding and
+decoding with struct.pack and struct.unpack and a format string, with
+precompiled struct.Struct objects and with apt.py, which uses format strings,
+then the whole Motor code path on a fake cube served over a pseudo-terminal
+(fake_cube.py, Linux and macOS only): the position reads and jogs of an
+acquisition, with the latency of each command.
+
+    python benchmarks/bench_motor.py [--latency 2] [--reads 200] [--jogs 10]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Michelson-GUI"))
+
+import apt
+from fake_cube import FakeCube
+from motor import Motor
+
+
+def codec_times(number=200000):
+    """ Time in µs per message of each way of encoding or decoding. """
+    data = struct.pack('<Hi', 1, 123456)
+    jog_parameters = struct.Struct('<HHBBHHIIIIH')
+    position = struct.Struct('<Hi')
+    timers = {
+            "encode SET_JOGPARAMS, format string": lambda: struct.pack('<HHBBHHIIIIH', 0x0416, 22, 0xD0, 0x01,
+                                                                         1, 2, 74710, 0, 110486, 10782410, 2),
+            "encode SET_JOGPARAMS, Struct": lambda: jog_parameters.pack(0x0416, 22, 0xD0, 0x01,
+                                                                         1, 2, 74710, 0, 110486, 10782410, 2),
+            "encode SET_JOGPARAMS, apt.py": lambda: apt.MOT_SET_JOGPARAMS.encode(0x50, 0x01, 1, 2, 74710, 0, 110486,
+                                                                                 10782410, 2),
+            "decode GET_POSCOUNTER, format string": lambda: struct.unpack('<Hi', data),
+            "decode GET_POSCOUNTER, Struct": lambda: position.unpack(data),
+            "decode GET_POSCOUNTER, apt.py": lambda: apt.MOT_GET_POSCOUNTER.decode(data)
+        }
+    return {name: min(timeit.repeat(timer, number=number, repeat=5))/number*1e6 for name, timer in timers.items()}
+
+
+def motor_times(latency, reads, jogs):
+    cube = FakeCube(latency=latency)
+    try:
+        start = time.perf_counter()
+        motor = Motor(cube.port, "ZST225B")
+        initialization = time.perf_counter() - start
+
+        for i in range(reads):
+            motor.get_absolute_position()
+        motor.set_step_size(0.02)
+        for i in range(jogs):
+            motor.jog(True)
+        statistics = motor.latency_statistics()
+        motor.close()
+    finally:
+        cube.close()
+    return initialization, statistics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=2, help="latency of the replies of the fake cube in ms")
+    parser.add_argument("--reads", type=int, default=200, help="position reads")
+    parser.add_argument("--jogs", type=int, default=10)
+    args = parser.parse_args()
+
+    print("{:<40}{:>10}".format("codec", "µs"))
+    for name, microseconds in codec_times().items():
+        print("{:<40}{:>10.3f}".format(name, microseconds))
+
+    initialization, statistics = motor_times(args.latency/1000, args.reads, args.jogs)
+    print()
+    print("Motor initialization with homing: {:.3f} s".format(initialization))
+    print("{:<32}{:>8}{:>11}{:>11}{:>11}".format("command latency", "count", "mean ms", "min ms", "max ms"))
+    for name, command in statistics.items():
+        print("{:<32}{:>8}{:>11.3f}{:>11.3f}{:>11.3f}".format(name, command["count"], command["mean"]*1e3,
+                                                            command["minimum"]*1e3, command["maximum"]*1e3))
@@ -0,0 +1,88 @@
+""" Measures the cold start of the FFT-GUI and Michelson-GUI entry points.
+
+Each main.py is launched in a new interpreter with "-X importtime". The time
+to first window is measured from the launch of the process to the first
+iteration of the Qt event loop, once the main window is shown. The import
+report lists the slowest imports and tells if scipy or matplotlib.pyplot were
+loaded.
+
+    python benchmarks/bench_startup.py [--runs 5] [--top 10] [fft|michelson ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+entry_points = {
+        "fft": os.path.join(repository, "FFT-GUI"),
+        "michelson": os.path.join(repository, "Michelson-GUI")
+    }
+
+# Runs main.py and quits as soon as the event loop starts with the window shown
+bootstrap = """
+import runpy, sys, time
+from PyQt5 import QtCore, QtWidgets
+
+class FirstWindowApplication(QtWidgets.QApplication):
+    def exec_(self):
+        QtCore.QTimer.singleShot(0, self.first_window)
+        return super().exec_()
+
+    def first_window(self):
+        sys.stderr.write("first window at {!r}\\n".format(time.time()))
+        self.quit()
+
+QtWidgets.QApplication = FirstWindowApplication
+runpy.run_path("main.py", run_name="__main__")
+"""
+
+heavy_modules = ["scipy", "matplotlib.pyplot"]
+
+
+def launch(directory):
+    start = time.time()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", bootstrap], cwd=directory,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    imports = {}
+    first_window = None
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("imported package"):
+            self_time, cumulative, module = line[len("import time:"):].split("|")
+            imports[module.strip()] = (int(self_time)/1e6, int(cumulative)/1e6, len(module) - len(module.lstrip()))
+        elif line.startswith("first window at"):
+            first_window = float(line.split()[-1])
+
+    if first_window is None:
+        raise RuntimeError("{} did not show its window:\n{}".format(directory, process.stderr[-2000:]))
+    return first_window - start, imports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("guis", nargs="*", help="among {} (default: all)".format(", ".join(entry_points)))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports listed")
+    args = parser.parse_args()
+    for gui in args.guis:
+        if gui not in entry_points:
+            parser.error("unknown GUI {!r}".format(gui))
+
+    for gui in args.guis or entry_points:
+        launches = [launch(entry_points[gui]) for i in range(args.runs)]
+        times = [first_window for first_window, imports in launches]
+        imports = launches[-1][1]
+
+        print("{}: time to first window {:.2f} s (median of {}, min {:.2f} s)".format(
+            gui, statistics.median(times), args.runs, min(times)))
+        print("  imports: {:.2f} s".format(sum(self_time for self_time, cumulative, level in imports.values())))
+        for module in heavy_modules:
+            print("  {} loaded: {}".format(module, "yes" if module in imports else "no"))
+
+        # Top level imports are indented by a single space in the report
+        top_level = [(cumulative, module) for module, (self_time, cumulative, level) in imports.items() if level == 1]
+        for cumulative, module in sorted(top_level, reverse=True)[:args.top]:
+            print("  {:8.3f} s  {}".format(cumulative, module))